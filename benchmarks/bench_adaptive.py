@@ -0,0 +1,55 @@
+"""Полный анализ против адаптивного: CPU на видео и сколько кадров декодировано / пропущено / отдано в модель.
+На синтетике человека нет, поэтому раннюю остановку видно только на реальном ролике (--video).
+
+    python benchmarks/bench_adaptive.py --seconds 180 --still-fraction 0.3
+    python benchmarks/bench_adaptive.py --video squats.mp4
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import make_synthetic_video, run_isolated
+
+
+def analyse(video_path: str, adaptive: bool) -> dict:
+    from analysis.pipeline import analyze_video
+    from analysis.pose import load_pose_model
+
+    load_pose_model()                                                           # Загрузку модели не считаем
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    result = analyze_video(video_path, adaptive=adaptive)
+    return {
+        'adaptive': adaptive,
+        'wall_seconds': round(time.perf_counter() - wall_started, 3),
+        'cpu_seconds': round(time.process_time() - cpu_started, 3),
+        **{key: result[key] for key in ('frames', 'detected_frames', 'reps', 'frames_decoded', 'frames_skipped',
+                                        'frames_analysed', 'early_exit', 'analysed_seconds') if key in result},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--still-fraction', type=float, default=0.3)
+    parser.add_argument('--video', help='готовое видео вместо синтетического')
+    parser.add_argument('--video-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    video_path = args.video or make_synthetic_video(
+        os.path.join(args.video_dir, f"synthetic_{int(args.seconds)}s_{args.width}x{args.height}_"
+                                     f"{int(args.fps)}fps_still{int(args.still_fraction * 100)}.mp4"),
+        args.seconds, args.fps, args.width, args.height, args.still_fraction,
+    )
+
+    for adaptive in (False, True):
+        print(json.dumps(run_isolated(analyse, video_path, adaptive), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Нагрузочный тест режима брокера: фронтенд ставит N видео в очередь, на той же машине
+запускается analysis_worker.py с разным числом процессов. Считаем пропускную способность
+и задержку от постановки в очередь до результата.
+
+    python benchmarks/bench_broker_workers.py --jobs 12 --workers 1,2,4
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import BOT_DIR, make_synthetic_video
+
+
+async def drain(db_path: str, video_path: str, jobs: int, processes: int) -> dict:
+    from analysis.pipeline import analyze_video
+    from broker import BrokerPool, SQLiteBroker
+
+    pool = BrokerPool(SQLiteBroker(db_path), max_workers=processes, poll_interval=0.05)
+    await pool.start()
+
+    worker = subprocess.Popen(
+        [sys.executable, os.path.join(BOT_DIR, 'analysis_worker.py'), '--db', db_path, '--processes', str(processes)],
+        cwd=BOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Разогрев: первая задача ждет загрузки модели во всех процессах
+        await asyncio.gather(*(pool.run(analyze_video, video_path) for _ in range(processes)))
+
+        async def timed_job():
+            started = time.perf_counter()
+            await pool.run(analyze_video, video_path)
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = sorted(await asyncio.gather(*(timed_job() for _ in range(jobs))))
+        seconds = time.perf_counter() - started
+    finally:
+        worker.terminate()
+        worker.wait()
+        pool.shutdown()
+
+    return {
+        'workers': processes,
+        'jobs': jobs,
+        'seconds': round(seconds, 2),
+        'videos_per_min': round(jobs / seconds * 60, 1),
+        'latency_p50': round(latencies[len(latencies) // 2], 2),
+        'latency_max': round(latencies[-1], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--jobs', type=int, default=12)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='broker_')
+    video_path = make_synthetic_video(os.path.join(workdir, 'clip.mp4'), seconds=args.seconds, width=640, height=360)
+    for processes in map(int, args.workers.split(',')):
+        db_path = os.path.join(workdir, f'jobs_{processes}.db')
+        print(json.dumps(asyncio.run(drain(db_path, video_path, args.jobs, processes)), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""Сколько воркер остается занят после /cancel: для задачи в работе и для задачи в очереди.
+Завершается с ошибкой, если слот освобождается дольше бюджета.
+
+    python benchmarks/bench_cancel.py --seconds 60 --budget 0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from common import make_synthetic_video
+
+
+async def wait_released(jobs, started: float) -> float:
+    while not all(job.future.done() for job in jobs):
+        await asyncio.sleep(0.005)
+    return round(time.perf_counter() - started, 3)
+
+
+async def run(video_path: str, cancel_after: float) -> dict:
+    from analysis.pipeline import analyze_video
+    from task_manager import TaskManager
+    from worker_pool import AnalysisWorkerPool
+
+    pool = AnalysisWorkerPool(max_workers=1)
+    await pool.start()
+    manager = TaskManager()
+    jobs = {}
+
+    async def analysis_task(user_id: int):
+        job = pool.submit(analyze_video, video_path)
+        jobs[user_id] = job
+        try:
+            return await job.result()
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    try:
+        # 1. Отмена задачи в работе
+        manager.register_task(1, asyncio.create_task(analysis_task(1)))
+        await asyncio.sleep(cancel_after)
+        started = time.perf_counter()
+        await manager.cancel_user_task(1)
+        running_released = await wait_released([jobs[1]], started)
+
+        # 2. Задача в очереди за другой: отменяем ее, затем первую - пул должен сразу освободиться
+        manager.register_task(2, asyncio.create_task(analysis_task(2)))
+        manager.register_task(3, asyncio.create_task(analysis_task(3)))
+        await asyncio.sleep(cancel_after)
+        await manager.cancel_user_task(3)
+        started = time.perf_counter()
+        await manager.cancel_user_task(2)
+        queued_released = await wait_released([jobs[2], jobs[3]], started)
+
+        await asyncio.sleep(0.05)
+        metrics = pool.metrics()
+    finally:
+        pool.shutdown()
+
+    return {
+        'running_slot_busy_after_cancel_s': running_released,
+        'pool_busy_after_cancel_with_queued_s': queued_released,
+        'busy_workers_after': metrics['busy_workers'],
+        'cancelled': metrics['cancelled'],
+        'completed': metrics['completed'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=60)
+    parser.add_argument('--cancel-after', type=float, default=2.0)
+    parser.add_argument('--budget', type=float, default=0.5, help='секунды')
+    args = parser.parse_args()
+
+    video_path = make_synthetic_video(
+        os.path.join(tempfile.gettempdir(), f"synthetic_{int(args.seconds)}s_1280x720_30fps.mp4"), args.seconds
+    )
+    report = asyncio.run(run(video_path, args.cancel_after))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    slowest = max(report['running_slot_busy_after_cancel_s'], report['pool_busy_after_cancel_with_queued_s'])
+    if slowest > args.budget or report['busy_workers_after']:
+        raise SystemExit(f"Воркер освобождается за {slowest} с, бюджет {args.budget} с")
+
+
+if __name__ == '__main__':
+    main()
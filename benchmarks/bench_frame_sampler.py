@@ -0,0 +1,89 @@
+"""Сравнение старого пути save_frames (JPEG в frames/ и повторное чтение)
+с потоковой выборкой кадров в памяти.
+
+    python benchmarks/bench_frame_sampler.py --seconds 60 --width 1280 --height 720
+"""
+import argparse
+import glob
+import json
+import os
+import tempfile
+import time
+
+from common import make_synthetic_video, run_isolated
+
+
+def legacy_path(video_path: str, every_n_frame: int) -> dict:
+    import cv2
+
+    out_dir = tempfile.mkdtemp(prefix='frames_')
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(video_path)
+    frame_count = 0
+    saved = 0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frame_count += 1
+        if frame_count % every_n_frame == 0:
+            cv2.imwrite(os.path.join(out_dir, f"v_frame_{saved:04d}.jpg"), frame)
+            saved += 1
+    cap.release()
+
+    for path in sorted(glob.glob(os.path.join(out_dir, '*.jpg'))):                  # Следующий этап читает JPEG заново
+        cv2.imread(path)
+        os.remove(path)
+    os.rmdir(out_dir)
+
+    elapsed = time.perf_counter() - started
+    return {'variant': 'legacy_jpeg', 'frames': frame_count, 'sampled': saved, 'seconds': round(elapsed, 3)}
+
+
+def stream_path(video_path: str, every_n_frame: int) -> dict:
+    from OpenCV import iter_frames
+
+    started = time.perf_counter()
+    sampled = 0
+    for _, frame in iter_frames(video_path, every_n_frame=every_n_frame, mode='read'):
+        sampled += 1
+    elapsed = time.perf_counter() - started
+    return {'variant': 'stream', 'sampled': sampled, 'seconds': round(elapsed, 3)}
+
+
+def batch_path(video_path: str, every_n_frame: int) -> dict:
+    from OpenCV import read_frames_batch
+
+    started = time.perf_counter()
+    batch = read_frames_batch(video_path, every_n_frame=every_n_frame, mode='read')
+    elapsed = time.perf_counter() - started
+    return {'variant': 'batch', 'sampled': len(batch), 'seconds': round(elapsed, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--every-n-frame', type=int, default=30)
+    parser.add_argument('--video-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    video_path = os.path.join(
+        args.video_dir, f"synthetic_{int(args.seconds)}s_{args.width}x{args.height}_{int(args.fps)}fps.mp4"
+    )
+    make_synthetic_video(video_path, args.seconds, args.fps, args.width, args.height)
+    decoded_frames = int(args.seconds * args.fps)
+
+    results = []
+    for variant in (legacy_path, stream_path, batch_path):
+        result = run_isolated(variant, video_path, args.every_n_frame)
+        if 'seconds' in result:
+            result['decoded_fps'] = round(decoded_frames / result['seconds'], 1)
+        results.append(result)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
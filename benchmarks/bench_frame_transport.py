@@ -0,0 +1,180 @@
+"""Пропускная способность передачи кадров между процессами: кольцо в общей памяти против pickle
+(multiprocessing.Queue и отдельная задача ProcessPoolExecutor на кадр). Потребитель только читает кадр.
+
+    python benchmarks/bench_frame_transport.py --frames 600 --width 1920 --height 1080
+    python benchmarks/bench_frame_transport.py --video squats.mp4     # + анализ видео: inline против shm
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import json
+import logging
+import multiprocessing
+import time
+
+import numpy as np
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+
+from frame_ring import FrameRing
+
+
+def _make_frame(width: int, height: int) -> np.ndarray:
+    return np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+
+
+def _touch(frame: np.ndarray) -> int:
+    # Потребитель читает весь кадр, иначе нулевое копирование выглядело бы бесплатным
+    return int(frame.sum(dtype=np.uint64)) & 0xff
+
+
+def _ring_producer(spec, frames: int, width: int, height: int):
+    ring = FrameRing.attach(spec)
+    frame = _make_frame(width, height)
+    try:
+        for i in range(frames):
+            ring.put(i, frame)
+        ring.finish()
+    finally:
+        ring.close()
+
+
+def _ring_consumer(spec, done):
+    ring = FrameRing.attach(spec)
+    count = 0
+    while True:
+        item = ring.get()
+        if item is None:
+            break
+        _touch(item[1])
+        item = None
+        ring.release()
+        count += 1
+    ring.close()
+    done.put(count)
+
+
+def _queue_producer(queue, frames: int, width: int, height: int):
+    frame = _make_frame(width, height)
+    for i in range(frames):
+        queue.put((i, frame))
+    queue.put(None)
+
+
+def _queue_consumer(queue, done):
+    count = 0
+    while True:
+        item = queue.get()
+        if item is None:
+            break
+        _touch(item[1])
+        count += 1
+    done.put(count)
+
+
+def bench_ring(frames: int, width: int, height: int, slots: int) -> float:
+    ring = FrameRing.create(slots, (height, width, 3))
+    done = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_ring_consumer, args=(ring.spec, done)),
+                 multiprocessing.Process(target=_ring_producer, args=(ring.spec, frames, width, height))]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    assert done.get(timeout=300) == frames
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    ring.close()
+    return elapsed
+
+
+def bench_queue(frames: int, width: int, height: int, slots: int) -> float:
+    queue = multiprocessing.Queue(maxsize=slots)                                # Та же глубина back-pressure
+    done = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_queue_consumer, args=(queue, done)),
+                 multiprocessing.Process(target=_queue_producer, args=(queue, frames, width, height))]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    assert done.get(timeout=300) == frames
+    elapsed = time.perf_counter() - started
+    for process in processes:
+        process.join()
+    return elapsed
+
+
+def bench_executor(frames: int, width: int, height: int, slots: int) -> float:
+    # Как раньше в пуле: кадр - аргумент задачи, pickle туда и обратно по очереди задач
+    frame = _make_frame(width, height)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=1) as executor:
+        executor.submit(int).result()                                           # Старт процесса не считаем
+        started = time.perf_counter()
+        pending = []
+        for i in range(frames):
+            pending.append(executor.submit(_touch, frame))
+            if len(pending) >= slots:
+                pending.pop(0).result()
+        for future in pending:
+            future.result()
+        return time.perf_counter() - started
+
+
+def bench_analysis(video_path: str, slots: int) -> list:
+    import config
+    config.FRAME_RING_SLOTS = slots
+    from analysis.pipeline import analyze_video
+    from parallel_analysis import analyze_shared
+    from worker_pool import AnalysisWorkerPool
+
+    async def run():
+        pool = AnalysisWorkerPool(max_workers=2)
+        await pool.start()
+        results = []
+        try:
+            for transport in ('inline', 'shm'):
+                started = time.perf_counter()
+                if transport == 'inline':
+                    result = await pool.run(analyze_video, video_path)
+                else:
+                    result = await analyze_shared(pool, video_path, 2)
+                results.append({
+                    'transport': transport,
+                    'latency_seconds': round(time.perf_counter() - started, 2),
+                    'frames': result['frames'],
+                })
+        finally:
+            pool.shutdown()
+        return results
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--frames', type=int, default=600)
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--slots', type=int, default=16)
+    parser.add_argument('--video', help='дополнительно сравнить анализ видео inline и через общую память')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    frame_mb = args.width * args.height * 3 / (1024 * 1024)
+    for name, bench in (('shm_ring', bench_ring), ('pickle_queue', bench_queue), ('pickle_executor', bench_executor)):
+        elapsed = bench(args.frames, args.width, args.height, args.slots)
+        print(json.dumps({
+            'transport': name,
+            'frame': f"{args.width}x{args.height}",
+            'frames': args.frames,
+            'seconds': round(elapsed, 3),
+            'frames_per_second': round(args.frames / elapsed, 1),
+            'mb_per_second': round(args.frames * frame_mb / elapsed, 1),
+        }, ensure_ascii=False))
+
+    if args.video:
+        for result in bench_analysis(args.video, args.slots):
+            print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
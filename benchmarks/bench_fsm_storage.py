@@ -0,0 +1,86 @@
+"""FSM-хранилища: задержка set_state/update_data для памяти, SQLite с отложенной записью
+и SQLite с записью на каждый вызов; размер сериализованного состояния marshal против JSON.
+
+    python benchmarks/bench_fsm_storage.py --users 5000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import marshal
+import os
+import tempfile
+import time
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from states.analysis_states import AnalysisStates
+from utils.fsm_storage import MARSHAL_VERSION, SQLiteStorage
+
+
+async def handler_flow(state: FSMContext, sync_flush: SQLiteStorage = None):
+    # Те же вызовы, что делает handle_exercise_video на одно видео
+    await state.set_state(AnalysisStates.waiting_for_video)
+    await state.update_data(processing_start_time=time.time())
+    await state.set_state(AnalysisStates.processing_video)
+    await state.update_data(video_path='/dev/shm/fitness_bot_uploads/video_1_1700000000.mp4')
+    await state.clear()
+    if sync_flush is not None:
+        await sync_flush.flush()
+
+
+async def run(name: str, storage, users: int, sync_flush: bool = False) -> dict:
+    latencies = []
+    for user_id in range(users):
+        state = FSMContext(storage=storage, key=StorageKey(bot_id=42, chat_id=user_id, user_id=user_id))
+        started = time.perf_counter()
+        await handler_flow(state, storage if sync_flush else None)
+        latencies.append(time.perf_counter() - started)
+    if isinstance(storage, SQLiteStorage):
+        started = time.perf_counter()
+        await storage.flush()
+        final_flush = time.perf_counter() - started
+    else:
+        final_flush = 0.0
+    await storage.close()
+
+    latencies.sort()
+    return {
+        'storage': name,
+        'flows': users,
+        'p50_us': round(latencies[len(latencies) // 2] * 1e6, 1),
+        'p99_us': round(latencies[int(len(latencies) * 0.99)] * 1e6, 1),
+        'final_flush_ms': round(final_flush * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=5000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix='fsm_')
+
+    async def report():
+        variants = [
+            ('memory', MemoryStorage(), False),
+            ('sqlite_write_behind', SQLiteStorage(os.path.join(workdir, 'behind.db')), False),
+            ('sqlite_sync', SQLiteStorage(os.path.join(workdir, 'sync.db')), True),
+        ]
+        for name, storage, sync_flush in variants:
+            print(json.dumps(await run(name, storage, args.users, sync_flush), ensure_ascii=False))
+
+    asyncio.run(report())
+
+    entry = (AnalysisStates.processing_video.state,
+             {'processing_start_time': time.time(), 'video_path': '/dev/shm/fitness_bot_uploads/video_1_1700000000.mp4'})
+    print(json.dumps({
+        'marshal_bytes': len(marshal.dumps(entry, MARSHAL_VERSION)),
+        'json_bytes': len(json.dumps(entry).encode()),
+    }))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Сквозная задержка handle_exercise_video: от получения видео до ответа с результатом.
+Бот и Telegram подменены (fakes.py), анализ идет в настоящем пуле процессов.
+Завершается с ошибкой, если задержка выше бюджета - так ловятся регрессии вроде sleep(5).
+
+    python benchmarks/bench_handler_latency.py --seconds 10 --budget 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+
+from common import make_synthetic_video
+from fakes import FakeBot, FakeMessage, make_state
+
+
+async def run(video_path: str, duration: int, workers: int) -> dict:
+    from handlers.video_handlers import handle_exercise_video
+    from states.analysis_states import AnalysisStates
+    from worker_pool import analysis_pool
+
+    analysis_pool.max_workers = workers
+    await analysis_pool.start()
+    try:
+        bot = FakeBot(video_path)
+        message = FakeMessage(bot, duration)
+        state = make_state(bot, message.from_user.id)
+        await state.set_state(AnalysisStates.waiting_for_video)
+
+        await handle_exercise_video(message, state)
+    finally:
+        analysis_pool.shutdown()
+
+    return {
+        'latency_seconds': round(message.replies[-1][0], 3),
+        'replies': [(round(at, 3), text.splitlines()[0]) for at, text in message.replies],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--budget', type=float, default=8.0, help='секунды')
+    args = parser.parse_args()
+
+    video_path = make_synthetic_video(
+        os.path.join(tempfile.gettempdir(), f"synthetic_{int(args.seconds)}s_{args.width}x{args.height}_30fps.mp4"),
+        args.seconds, 30, args.width, args.height,
+    )
+    os.chdir(tempfile.mkdtemp(prefix='bench_handler_'))                          # uploads/ пишем во временную папку
+
+    report = asyncio.run(run(video_path, int(args.seconds), args.workers))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if report['latency_seconds'] > args.budget:
+        raise SystemExit(f"Задержка {report['latency_seconds']} с превышает бюджет {args.budget} с")
+
+
+if __name__ == '__main__':
+    main()
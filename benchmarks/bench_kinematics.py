@@ -0,0 +1,77 @@
+"""Микробенчмарк ядра углов и подсчета повторений на массиве поз (T, 33, 4).
+
+    python benchmarks/bench_kinematics.py --seconds 180 --fps 30
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+from analysis.kinematics import joint_angles, score_technique, smooth_angles, summarize_reps
+
+
+def synthetic_squats(seconds: float, fps: float, rep_seconds: float = 3.0, seed: int = 0) -> np.ndarray:
+    # Скелет в профиль: голеностоп неподвижен, таз опускается и поднимается
+    t = np.arange(int(seconds * fps)) / fps
+    depth = (1 - np.cos(2 * np.pi * t / rep_seconds)) / 2                      # 0 - стоя, 1 - присед
+
+    landmarks = np.zeros((len(t), 33, 4), dtype=np.float32)
+    landmarks[..., 3] = 0.95
+    ankle = np.stack([np.full_like(t, 0.50), np.full_like(t, 0.90)], axis=1)
+    knee = np.stack([0.50 + 0.12 * depth, 0.70 + 0.03 * depth], axis=1)
+    hip = np.stack([0.50 - 0.05 * depth, 0.50 + 0.18 * depth], axis=1)
+    shoulder = np.stack([0.50 + 0.02 * depth, 0.25 + 0.15 * depth], axis=1)
+    elbow = shoulder + np.array([0.05, 0.12])
+    wrist = elbow + np.array([0.10, 0.0])
+    for left, right, point in ((27, 28, ankle), (25, 26, knee), (23, 24, hip),
+                               (11, 12, shoulder), (13, 14, elbow), (15, 16, wrist)):
+        landmarks[:, left, :2] = point
+        landmarks[:, right, :2] = point
+
+    rng = np.random.default_rng(seed)
+    landmarks[..., :2] += rng.normal(0, 0.003, landmarks[..., :2].shape)
+    landmarks[rng.random(len(t)) < 0.05] = np.nan                               # Пропуски детекции
+    return landmarks
+
+
+def timeit(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=180)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--budget-ms', type=float, default=20.0)
+    args = parser.parse_args()
+
+    landmarks = synthetic_squats(args.seconds, args.fps)
+    angles = joint_angles(landmarks)
+    smoothed = smooth_angles(angles, args.fps)
+
+    report = {
+        'frames': len(landmarks),
+        'joint_angles_ms': timeit(lambda: joint_angles(landmarks), args.repeat),
+        'smooth_ms': timeit(lambda: smooth_angles(angles, args.fps), args.repeat),
+        'reps_ms': timeit(lambda: summarize_reps(smoothed, args.fps), args.repeat),
+        'total_ms': timeit(lambda: score_technique(landmarks, args.fps), args.repeat),
+        'result': score_technique(landmarks, args.fps),
+        'expected_reps': int(args.seconds // 3.0),
+    }
+    report = {key: round(value, 3) if isinstance(value, float) else value for key, value in report.items()}
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+    if report['total_ms'] > args.budget_ms:
+        raise SystemExit(f"score_technique: {report['total_ms']} мс > бюджета {args.budget_ms} мс")
+
+
+if __name__ == '__main__':
+    main()
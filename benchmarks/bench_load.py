@@ -0,0 +1,264 @@
+"""Сквозной нагрузочный тест: N видео через handle_exercise_video при заданной параллельности.
+Видео - синтетические (cv2.VideoWriter), набор длин / разрешений / fps; Telegram подменен fakes.py
+(скачивание с заданной скоростью, ответы пишутся в память), анализ - в настоящем пуле процессов.
+Отчет - JSON: задержка p50/p95/p99, видео в минуту, время этапов из гистограмм метрик,
+CPU и пиковый RSS процесса бота и воркеров анализа. Два отчета сравниваются через --compare.
+
+    python benchmarks/bench_load.py --videos 24 --concurrency 4 --workers 2 --output load.json
+    python benchmarks/bench_load.py --lengths 10,60 --resolutions 640x360,1920x1080 --fps 30,60
+    python benchmarks/bench_load.py --compare before.json after.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import tempfile
+import time
+from typing import Dict, List
+
+import psutil
+
+from common import BOT_DIR, make_synthetic_video
+from fakes import FakeBot, FakeMessage, make_state
+
+COMPARE_KEYS = ('latency_p50', 'latency_p95', 'latency_p99', 'videos_per_min',
+                'bot_cpu_seconds', 'workers_cpu_seconds', 'bot_peak_rss_mb', 'workers_peak_rss_mb')
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q / 100 * (len(values) - 1))))]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BOT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+class ProcessSampler:
+    # Раз в interval секунд: RSS бота и воркеров (пик) и CPU каждого процесса (последнее значение;
+    # воркер, перезапущенный при recycle, свое CPU уже отдал)
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.peak_rss = {'bot': 0, 'workers': 0}
+        self.worker_cpu: Dict[int, float] = {}
+        self._task = None
+
+    def _sample(self):
+        self.peak_rss['bot'] = max(self.peak_rss['bot'], self.process.memory_info().rss)
+        workers_rss = 0
+        for child in self.process.children(recursive=True):
+            try:
+                cpu = child.cpu_times()
+                workers_rss += child.memory_info().rss
+            except psutil.NoSuchProcess:
+                continue
+            self.worker_cpu[child.pid] = cpu.user + cpu.system
+        self.peak_rss['workers'] = max(self.peak_rss['workers'], workers_rss)
+
+    async def _run(self):
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> Dict[int, float]:
+        self._sample()
+        baseline = dict(self.worker_cpu)                                        # Разогрев пула не считаем
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return baseline
+
+    def stop(self):
+        self._task.cancel()
+        self._sample()
+
+
+def stage_snapshot() -> Dict[str, Dict[str, float]]:
+    # Состояние гистограммы fitness_bot_stage_seconds: count, sum и накопленные корзины по этапам
+    import metrics
+
+    snapshot = {stage: {'count': 0.0, 'sum': 0.0, 'buckets': {}} for stage in metrics.STAGES}
+    for family in metrics.STAGE_SECONDS.collect():
+        for sample in family.samples:
+            stage = snapshot[sample.labels['stage']]
+            if sample.name.endswith('_count'):
+                stage['count'] = sample.value
+            elif sample.name.endswith('_sum'):
+                stage['sum'] = sample.value
+            elif sample.name.endswith('_bucket'):
+                stage['buckets'][float(sample.labels['le'])] = sample.value
+    return snapshot
+
+
+def bucket_quantile(buckets: Dict[float, float], q: float) -> float:
+    # Как histogram_quantile в Prometheus: линейная интерполяция внутри корзины
+    total = buckets.get(float('inf'), 0.0)
+    if not total:
+        return 0.0
+    rank = q * total
+    lower_bound, lower_count = 0.0, 0.0
+    for bound, count in sorted(buckets.items()):
+        if count >= rank:
+            if bound == float('inf'):
+                return lower_bound
+            return lower_bound + (bound - lower_bound) * (rank - lower_count) / max(count - lower_count, 1e-9)
+        lower_bound, lower_count = bound, count
+    return lower_bound
+
+
+def stage_report(before: Dict, after: Dict) -> Dict[str, Dict[str, float]]:
+    report = {}
+    for stage, end in after.items():
+        start = before[stage]
+        count = end['count'] - start['count']
+        if not count:
+            continue
+        buckets = {bound: value - start['buckets'].get(bound, 0.0) for bound, value in end['buckets'].items()}
+        report[stage] = {
+            'count': int(count),
+            'mean_seconds': round((end['sum'] - start['sum']) / count, 4),
+            'p95_seconds': round(bucket_quantile(buckets, 0.95), 4),
+        }
+    return report
+
+
+async def run(videos: List[dict], requests: int, concurrency: int, workers: int,
+              bandwidth_mb_s: float, reply_latency: float, use_cache: bool) -> dict:
+    import config
+    from handlers.video_handlers import handle_exercise_video
+    from scheduler import scheduler
+    from states.analysis_states import AnalysisStates
+    from utils.result_cache import result_cache
+    from utils.results_store import results_store
+    from worker_pool import analysis_pool
+
+    config.PROGRESS_BARS = False                                                # Воркеры наследуют настройку при старте пула
+    if not use_cache:
+        result_cache.max_entries = 0                                            # Одинаковые файлы иначе вернутся из кэша
+    scheduler.max_queue = max(scheduler.max_queue, concurrency)
+    analysis_pool.max_workers = workers
+    await analysis_pool.start()
+
+    bots = [FakeBot(video['path'], bandwidth_mb_s) for video in videos]
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = {'ok': 0, 'rejected': 0, 'error': 0}
+    latencies = []
+
+    async def send(i: int):
+        video = videos[i % len(videos)]
+        async with semaphore:
+            message = FakeMessage(bots[i % len(videos)], int(video['seconds']), reply_latency=reply_latency)
+            state = make_state(message.bot, message.from_user.id)
+            await state.set_state(AnalysisStates.waiting_for_video)
+            await handle_exercise_video(message, state)
+        last = message.replies[-1][1] if message.replies else ''
+        if last.startswith('⏳'):                                                # Очередь или квота загрузок заполнены
+            outcomes['rejected'] += 1
+        elif last.startswith('✅') or 'распознать человека' in last:           # На синтетике человека нет - анализ все равно полный
+            outcomes['ok'] += 1
+            latencies.append(message.replies[-1][0])
+        else:
+            outcomes['error'] += 1
+
+    sampler = ProcessSampler()
+    stages_before = stage_snapshot()
+    cpu_baseline = sampler.start()
+    bot_cpu_started = time.process_time()
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*(send(i) for i in range(requests)))
+        seconds = time.perf_counter() - started
+        bot_cpu = time.process_time() - bot_cpu_started
+    finally:
+        sampler.stop()
+        analysis_pool.shutdown()
+        await results_store.close()
+
+    workers_cpu = sum(cpu - cpu_baseline.get(pid, 0.0) for pid, cpu in sampler.worker_cpu.items())
+    return {
+        'commit': git_commit(),
+        'requests': requests,
+        'concurrency': concurrency,
+        'workers': workers,
+        'videos': [{key: video[key] for key in ('seconds', 'width', 'height', 'fps')} for video in videos],
+        **outcomes,
+        'seconds': round(seconds, 2),
+        'videos_per_min': round(outcomes['ok'] / seconds * 60, 1),
+        'latency_p50': round(percentile(latencies, 50), 3),
+        'latency_p95': round(percentile(latencies, 95), 3),
+        'latency_p99': round(percentile(latencies, 99), 3),
+        'stages': stage_report(stages_before, stage_snapshot()),
+        'bot_cpu_seconds': round(bot_cpu, 2),
+        'workers_cpu_seconds': round(workers_cpu, 2),
+        'bot_peak_rss_mb': round(sampler.peak_rss['bot'] / (1024 * 1024), 1),
+        'workers_peak_rss_mb': round(sampler.peak_rss['workers'] / (1024 * 1024), 1),
+    }
+
+
+def compare(before_path: str, after_path: str):
+    with open(before_path, encoding='utf-8') as before_file, open(after_path, encoding='utf-8') as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f"{before.get('commit') or before_path} -> {after.get('commit') or after_path}")
+    rows = [(key, before.get(key), after.get(key)) for key in COMPARE_KEYS]
+    for stage in sorted(set(before.get('stages', {})) | set(after.get('stages', {}))):
+        rows.append((f"{stage}.mean_seconds", before.get('stages', {}).get(stage, {}).get('mean_seconds'),
+                     after.get('stages', {}).get(stage, {}).get('mean_seconds')))
+    for key, old, new in rows:
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ''
+        print(f"  {key:<32} {old!s:>10} {new!s:>10} {change:>9}")
+
+
+def parse_resolutions(value: str) -> List[tuple]:
+    return [tuple(int(side) for side in item.split('x')) for item in value.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--videos', type=int, default=24, help='сколько видео отправить')
+    parser.add_argument('--concurrency', type=int, default=4, help='пользователей отправляют одновременно')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--lengths', default='10,30', help='секунды')
+    parser.add_argument('--resolutions', default='640x360,1280x720')
+    parser.add_argument('--fps', default='30')
+    parser.add_argument('--bandwidth', type=float, default=20, help='МБ/с "скачивания" из Telegram, 0 - мгновенно')
+    parser.add_argument('--reply-latency', type=float, default=0.05, help='секунды на один ответ бота')
+    parser.add_argument('--cache', action='store_true', help='не отключать кэш результатов')
+    parser.add_argument('--video-dir', default=tempfile.gettempdir())
+    parser.add_argument('--output', help='куда записать JSON-отчет')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    videos = []
+    for seconds, (width, height), fps in itertools.product(
+            map(float, args.lengths.split(',')), parse_resolutions(args.resolutions), map(float, args.fps.split(','))):
+        path = make_synthetic_video(
+            os.path.join(args.video_dir, f"synthetic_{int(seconds)}s_{width}x{height}_{int(fps)}fps.mp4"),
+            seconds, fps, width, height,
+        )
+        videos.append({'path': path, 'seconds': seconds, 'width': width, 'height': height, 'fps': fps})
+
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(tempfile.mkdtemp(prefix='bench_load_'))                             # data/ и uploads/ - во временной папке
+    report = asyncio.run(run(videos, args.videos, args.concurrency, args.workers, args.bandwidth,
+                             args.reply_latency, args.cache))
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    print(text)
+    if output:
+        with open(output, 'w', encoding='utf-8') as output_file:
+            output_file.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
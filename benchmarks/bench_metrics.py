@@ -0,0 +1,81 @@
+"""Цена инструментирования: замер этапа (observe/span), сбор /metrics и tqdm на каждом кадре.
+
+    python benchmarks/bench_metrics.py --observations 200000
+    python benchmarks/bench_metrics.py --seconds 60                 # + выборка кадров с tqdm и без
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from common import make_synthetic_video
+
+
+def bench_observe(observations: int) -> dict:
+    import metrics
+
+    started = time.perf_counter()
+    for _ in range(observations):
+        metrics.observe('inference', 0.01)
+    observe_ns = (time.perf_counter() - started) / observations * 1e9
+
+    started = time.perf_counter()
+    for _ in range(observations):
+        with metrics.span('reply'):
+            pass
+    span_ns = (time.perf_counter() - started) / observations * 1e9
+
+    from prometheus_client import generate_latest
+    started = time.perf_counter()
+    for _ in range(100):
+        payload = generate_latest()
+    return {
+        'observe_ns': round(observe_ns),
+        'span_ns': round(span_ns),
+        'scrape_ms': round((time.perf_counter() - started) * 10, 3),
+        'scrape_bytes': len(payload),
+    }
+
+
+def bench_progress(video_path: str) -> list:
+    import config
+    from OpenCV import iter_frames
+
+    results = []
+    for progress_bars in (True, False):
+        config.PROGRESS_BARS = progress_bars
+        stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')                  # Как в воркере: вывод никто не читает
+        started = time.process_time()
+        try:
+            frames = sum(1 for _ in iter_frames(video_path, every_n_frame=1, mode='grab'))
+        finally:
+            sys.stderr.close()
+            sys.stderr = stderr
+        results.append({
+            'progress_bars': progress_bars,
+            'frames': frames,
+            'cpu_seconds': round(time.process_time() - started, 3),
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--observations', type=int, default=200000)
+    parser.add_argument('--seconds', type=float, default=0, help='длина синтетического видео для сравнения tqdm')
+    parser.add_argument('--video-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    print(json.dumps(bench_observe(args.observations), ensure_ascii=False))
+    if args.seconds:
+        video_path = make_synthetic_video(
+            os.path.join(args.video_dir, f"synthetic_{int(args.seconds)}s_640x360_30fps.mp4"), args.seconds, 30, 640, 360
+        )
+        for result in bench_progress(video_path):
+            print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Лимитер на 1M синтетических пользователей: скорость проверки, память на пользователя и очистка.
+
+    python benchmarks/bench_rate_limit.py --users 1000000
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+from utils.rate_limit import MemoryBackend, RateLimiter, SQLiteBackend
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def fill(limiter: RateLimiter, clock: Clock, users: int) -> float:
+    started = time.perf_counter()
+    for user_id in range(users):
+        await limiter.check_rate_limit(user_id)
+        clock.now += 0.0001
+    return time.perf_counter() - started
+
+
+async def bench_memory(users: int) -> dict:
+    clock = Clock()
+    limiter = RateLimiter(backend=MemoryBackend(), clock=clock, sweep_interval=float('inf'))
+
+    tracemalloc.start()
+    seconds = await fill(limiter, clock, users)
+    memory_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    hot_user_checks = 100_000
+    for i in range(hot_user_checks):
+        await limiter.check_rate_limit(i % 1000)
+    hot_seconds = time.perf_counter() - started
+
+    clock.now += 3600
+    stalls = []
+
+    async def ticker():
+        # Самая долгая пауза цикла событий во время очистки - столько ждал бы обработчик
+        last = time.perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = time.perf_counter()
+            stalls.append(now - last)
+            last = now
+
+    ticking = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    removed = await limiter.sweep()
+    sweep_seconds = time.perf_counter() - started
+    ticking.cancel()
+
+    return {
+        'backend': 'memory',
+        'users': users,
+        'checks_per_sec_new_users': round(users / seconds),
+        'checks_per_sec_hot_users': round(hot_user_checks / hot_seconds),
+        'bytes_per_user': round(memory_bytes / users, 1),
+        'sweep_removed': removed,
+        'sweep_seconds': round(sweep_seconds, 3),
+        'sweep_max_stall_ms': round(max(stalls, default=0.0) * 1000, 1),
+        'table_size_after_sweep': len(limiter),
+    }
+
+
+async def bench_sqlite(users: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix='rate_limit_'), 'limits.db')
+    clock = Clock()
+    limiter = RateLimiter(backend=SQLiteBackend(path), clock=clock, sweep_interval=float('inf'))
+    seconds = await fill(limiter, clock, users)
+
+    clock.now += 3600
+    started = time.perf_counter()
+    removed = await limiter.sweep()
+    return {
+        'backend': 'sqlite',
+        'users': users,
+        'checks_per_sec_new_users': round(users / seconds),
+        'db_bytes_per_user': round(os.path.getsize(path) / users, 1),
+        'sweep_removed': removed,
+        'sweep_seconds': round(time.perf_counter() - started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--sqlite-users', type=int, default=50_000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)                                            # Лог на каждый запрос исказит замер
+
+    print(json.dumps(asyncio.run(bench_memory(args.users)), ensure_ascii=False))
+    print(json.dumps(asyncio.run(bench_sqlite(args.sqlite_users)), ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Хранилище результатов: скорость пакетной записи и задержка чтения истории/сводок на большой базе.
+Завершается с ошибкой, если p99 чтения дольше бюджета.
+
+    python benchmarks/bench_results_store.py --users 10000 --per-user 50 --budget-ms 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+from utils.results_store import ResultsStore
+
+
+def fake_result(rng: random.Random) -> dict:
+    return {
+        'frames': 300, 'detected_frames': 290,
+        'reps': rng.randint(3, 15),
+        'technique_score': rng.randint(40, 100),
+        'amplitude': 'Хорошо', 'speed': 'Нормальная', 'recommendation': '',
+        'primary_joint': rng.choice(('knee', 'hip', 'elbow')),
+        'amplitude_deg': round(rng.uniform(30, 110), 1),
+        'tempo_sec': round(rng.uniform(1, 4), 2),
+    }
+
+
+def percentile_ms(samples, q: float) -> float:
+    samples = sorted(samples)
+    return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 3)
+
+
+async def run(users: int, per_user: int, reads: int) -> dict:
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(prefix='results_'), 'results.db')
+    store = ResultsStore(path, flush_interval=3600, batch_size=10_000)
+
+    started = time.perf_counter()
+    for i in range(users * per_user):
+        store.add(i % users, fake_result(rng))
+        if len(store._pending) >= store.batch_size:
+            await store.flush()
+    await store.flush()
+    write_seconds = time.perf_counter() - started
+
+    history, summaries, pages = [], [], []
+    for _ in range(reads):
+        user_id = rng.randrange(users)
+        t0 = time.perf_counter()
+        page = await store.history(user_id)
+        t1 = time.perf_counter()
+        await store.summaries(user_id)
+        t2 = time.perf_counter()
+        await store.history(user_id, before=page[-1].created_at)
+        t3 = time.perf_counter()
+        history.append(t1 - t0)
+        summaries.append(t2 - t1)
+        pages.append(t3 - t2)
+    await store.close()
+
+    return {
+        'rows': users * per_user,
+        'writes_per_sec': round(users * per_user / write_seconds),
+        'db_mb': round(os.path.getsize(path) / 1024 / 1024, 1),
+        'history_p50_ms': percentile_ms(history, 0.5),
+        'history_p99_ms': percentile_ms(history, 0.99),
+        'next_page_p99_ms': percentile_ms(pages, 0.99),
+        'summaries_p50_ms': percentile_ms(summaries, 0.5),
+        'summaries_p99_ms': percentile_ms(summaries, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10_000)
+    parser.add_argument('--per-user', type=int, default=50)
+    parser.add_argument('--reads', type=int, default=1000)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    result = asyncio.run(run(args.users, args.per_user, args.reads))
+    print(json.dumps(result, ensure_ascii=False))
+    worst = max(result['history_p99_ms'], result['next_page_p99_ms'], result['summaries_p99_ms'])
+    if args.budget_ms is not None and worst > args.budget_ms:
+        print(f"FAIL: p99 чтения {worst} мс > бюджета {args.budget_ms} мс")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Проверка планировщика без видео: пул-заглушка и отмена задачи в момент выдачи слота.
+Слот, выданный _dispatch задаче, которую отменили до ее пробуждения, должен вернуться.
+
+    python benchmarks/bench_scheduler.py --rounds 200
+"""
+import argparse
+import asyncio
+import json
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+
+
+class FakePool:
+    segmentable = True
+    shared_memory = False
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+
+    async def run(self, fn, *args, **kwargs):
+        await asyncio.sleep(0.001)
+        return fn
+
+
+async def cancel_on_grant(scheduler, split: bool):
+    # Первая задача держит единственный слот, вторая ждет. Слот переходит ко второй,
+    # и ее отменяют в том же шаге цикла - до того, как она проснулась
+    holder_ticket = scheduler.admit(1)
+    waiter_ticket = scheduler.admit(2)
+    hold = asyncio.Event()
+
+    async def holder(pool, parts):
+        await hold.wait()
+
+    async def waiter_job(pool, parts):
+        return parts
+
+    holder_task = asyncio.create_task(scheduler.run_split(holder_ticket, holder, 0))
+    await asyncio.sleep(0)
+    if split:
+        waiter = asyncio.create_task(scheduler.run_split(waiter_ticket, waiter_job, 0))
+    else:
+        waiter = asyncio.create_task(scheduler.run(waiter_ticket, 'job'))
+    await asyncio.sleep(0)
+
+    dispatch = scheduler._dispatch
+
+    def dispatch_and_cancel():
+        dispatch()
+        if waiter_ticket.started and not waiter.done():
+            waiter.cancel()
+
+    scheduler._dispatch = dispatch_and_cancel
+    hold.set()
+    await asyncio.gather(holder_task, waiter, return_exceptions=True)
+    scheduler._dispatch = dispatch
+    for ticket in (holder_ticket, waiter_ticket):
+        scheduler.release(ticket)
+    return waiter.cancelled()
+
+
+async def run(rounds: int) -> dict:
+    from scheduler import JobScheduler
+
+    scheduler = JobScheduler(FakePool(max_workers=1), max_queue=10)
+    cancelled = 0
+    for i in range(rounds):
+        try:
+            cancelled += await asyncio.wait_for(cancel_on_grant(scheduler, split=bool(i % 2)), timeout=5)
+        except asyncio.TimeoutError:                                            # Слот утек в прошлом раунде - задачи ждут вечно
+            return {'rounds': i, 'cancelled_on_grant': cancelled, 'next_job': None, **scheduler.metrics()}
+
+    ticket = scheduler.admit(3)                                                 # Слот свободен - задача не ждет вечно
+    try:
+        next_job = await asyncio.wait_for(scheduler.run(ticket, 'next'), timeout=5)
+    except asyncio.TimeoutError:
+        next_job = None
+    finally:
+        scheduler.release(ticket)
+    return {'rounds': rounds, 'cancelled_on_grant': cancelled, 'next_job': next_job, **scheduler.metrics()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.rounds))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    if report['running'] or report['admitted'] or report['next_job'] is None:
+        raise SystemExit(f"Потерян слот планировщика: running={report['running']}, admitted={report['admitted']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Задержка анализа одного длинного видео в зависимости от числа отрезков (пул простаивает).
+Кадров после склейки должно быть столько же, сколько без деления, - иначе код выхода 1.
+Длительность передается целой, как message.video.duration от Telegram, поэтому длина видео
+по умолчанию дробная: хвост после целой секунды тоже должен попасть в анализ.
+
+    python benchmarks/bench_segments.py --seconds 180.7 --workers 4 --segments 1,2,4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+
+from common import make_synthetic_video
+
+
+async def run(video_path: str, duration: float, workers: int, segment_counts) -> list:
+    from parallel_analysis import analyze_segments
+    from worker_pool import AnalysisWorkerPool
+
+    pool = AnalysisWorkerPool(max_workers=workers)
+    await pool.start()
+    results = []
+    try:
+        for parts in segment_counts:
+            started = time.perf_counter()
+            result = await analyze_segments(pool, video_path, duration, parts)
+            results.append({
+                'segments': parts,
+                'workers': workers,
+                'latency_seconds': round(time.perf_counter() - started, 2),
+                'frames': result['frames'],
+            })
+    finally:
+        pool.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=180.7)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--segments', default='1,2,4')
+    parser.add_argument('--video', help='готовое видео вместо синтетического')
+    parser.add_argument('--video-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    video_path = args.video or make_synthetic_video(
+        os.path.join(args.video_dir, f"synthetic_{args.seconds:g}s_{args.width}x{args.height}_30fps.mp4"),
+        args.seconds, 30, args.width, args.height,
+    )
+    from OpenCV import probe_video
+    duration = int(probe_video(video_path).duration)                            # Как message.video.duration
+
+    segment_counts = [int(count) for count in args.segments.split(',')]
+    results = asyncio.run(run(video_path, duration, args.workers, segment_counts))
+    for result in results:
+        print(json.dumps(result, ensure_ascii=False))
+    if len({result['frames'] for result in results}) > 1:
+        raise SystemExit(f"Число кадров зависит от деления на отрезки: {[result['frames'] for result in results]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""CPU на одно видео для режимов выборки read / grab / seek / auto.
+
+    python benchmarks/bench_sparse_decoding.py --seconds 180 --sample-fps 1
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import make_synthetic_video, run_isolated
+
+
+def sample_video(video_path: str, sample_fps: float, mode: str) -> dict:
+    from OpenCV import iter_frames
+
+    wall_started = time.perf_counter()
+    cpu_started = time.process_time()
+    sampled = sum(1 for _ in iter_frames(video_path, sample_fps, mode=mode))
+    return {
+        'mode': mode,
+        'sampled': sampled,
+        'wall_seconds': round(time.perf_counter() - wall_started, 3),
+        'cpu_seconds': round(time.process_time() - cpu_started, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seconds', type=float, default=180)
+    parser.add_argument('--fps', type=float, default=30)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    parser.add_argument('--sample-fps', type=float, default=1.0)
+    parser.add_argument('--video', help='готовое видео вместо синтетического')
+    parser.add_argument('--video-dir', default=tempfile.gettempdir())
+    args = parser.parse_args()
+
+    video_path = args.video or make_synthetic_video(
+        os.path.join(args.video_dir,
+                     f"synthetic_{int(args.seconds)}s_{args.width}x{args.height}_{int(args.fps)}fps.mp4"),
+        args.seconds, args.fps, args.width, args.height,
+    )
+
+    baseline = None
+    for mode in ('read', 'grab', 'seek', 'auto'):
+        result = run_isolated(sample_video, video_path, args.sample_fps, mode)
+        if 'cpu_seconds' in result:
+            if baseline is None:
+                baseline = result['cpu_seconds']
+            result['cpu_speedup'] = round(baseline / max(result['cpu_seconds'], 1e-6), 2)
+        print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
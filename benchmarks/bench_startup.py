@@ -0,0 +1,100 @@
+"""Цена запуска фронтенда бота: время импорта модулей (как python -X importtime) и RSS после импорта.
+Замер - в чистом подпроцессе; тяжелые зависимости анализа (cv2, mediapipe, scipy, numpy, tqdm)
+должны грузиться только в воркерах. С бюджетами скрипт - проверка регрессии: код выхода 1, если
+импорт дольше --budget-ms, RSS больше --budget-rss-mb или в боте оказался тяжелый модуль.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 3000 --budget-rss-mb 130 --top 15
+"""
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+from common import BOT_DIR
+
+# Что импортирует bot.py (сам bot.py требует Token.py с токеном)
+FRONTEND_MODULES = (
+    'handlers.callback_handlers', 'handlers.text_handlers', 'handlers.user_commands', 'handlers.video_handlers',
+    'metrics', 'recovery', 'scheduler', 'task_manager', 'utils.fsm_storage', 'utils.rate_limit',
+    'utils.results_store', 'webhook', 'worker_pool', 'parallel_analysis', 'maintenance',
+)
+HEAVY_MODULES = ('cv2', 'mediapipe', 'scipy', 'numpy', 'tqdm')
+
+_PROBE = """
+import json, resource, sys, time
+started = time.perf_counter()
+for name in {modules!r}:
+    __import__(name)
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    'import_ms': elapsed * 1000,
+    'rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy': [name for name in {heavy!r} if name in sys.modules],
+    'modules': len(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    # Строки "import time: self [us] | cumulative | imported package"; берем собственное время модуля
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        rows.append({
+            'module': name.strip(),
+            'self_ms': int(self_us) / 1000,
+        })
+    return rows
+
+
+def measure(modules=FRONTEND_MODULES) -> Dict:
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROBE.format(modules=tuple(modules), heavy=HEAVY_MODULES)],
+        cwd=BOT_DIR, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    report['rows'] = parse_importtime(completed.stderr)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=3, help='берется лучший замер (первый еще компилирует .pyc)')
+    parser.add_argument('--top', type=int, default=10, help='сколько самых дорогих пакетов показать')
+    # По умолчанию - с запасом над текущим (~2.6 с, ~115 МБ); до переноса анализа в воркеры было ~4.4 с и ~217 МБ
+    parser.add_argument('--budget-ms', type=float, default=4000, help='предел времени импорта, 0 - без проверки')
+    parser.add_argument('--budget-rss-mb', type=float, default=160, help='предел RSS после импорта, 0 - без проверки')
+    args = parser.parse_args()
+
+    report = min((measure() for _ in range(args.repeat)), key=lambda result: result['import_ms'])
+    packages: Dict[str, float] = {}
+    for row in report['rows']:                                                  # Собственное время, сложенное по корневому пакету
+        package = row['module'].split('.')[0]
+        packages[package] = packages.get(package, 0.0) + row['self_ms']
+    top = sorted(packages.items(), key=lambda item: -item[1])
+    print(json.dumps({
+        'import_ms': round(report['import_ms'], 1),
+        'rss_mb': round(report['rss_mb'], 1),
+        'modules': report['modules'],
+        'heavy_modules': report['heavy'],
+        'top_packages_ms': {package: round(self_ms, 1) for package, self_ms in top[:args.top]},
+    }, ensure_ascii=False, indent=2))
+
+    failures = []
+    if report['heavy']:
+        failures.append(f"фронтенд импортирует {', '.join(report['heavy'])}")
+    if args.budget_ms and report['import_ms'] > args.budget_ms:
+        failures.append(f"импорт {report['import_ms']:.0f} мс > {args.budget_ms:.0f} мс")
+    if args.budget_rss_mb and report['rss_mb'] > args.budget_rss_mb:
+        failures.append(f"RSS {report['rss_mb']:.0f} МБ > {args.budget_rss_mb:.0f} МБ")
+    for failure in failures:
+        print(f"❌ {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
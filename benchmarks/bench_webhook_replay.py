@@ -0,0 +1,124 @@
+"""Replay обновлений Telegram в локальный webhook-сервер: пропускная способность роутеров без реального API.
+Обновления берутся из JSONL (например, записанного через WEBHOOK_RECORD_PATH) или генерируются.
+
+    python benchmarks/bench_webhook_replay.py --count 5000 --concurrency 40
+    python benchmarks/bench_webhook_replay.py --updates recorded.jsonl
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import tempfile
+import time
+
+import aiohttp
+
+from fakes import FakeSession
+
+SCRIPT = [
+    ('text', '/start'),
+    ('text', '📚 Инструкция'),
+    ('callback', 'instruction'),
+    ('text', '📊 Мои результаты'),
+    ('callback', 'analyz_exercise'),
+    ('text', 'не видео'),
+    ('text', '/cancel'),
+    ('text', 'привет'),
+]
+
+
+def synthetic_updates(count: int, users: int):
+    now = int(time.time())
+    for update_id, (kind, value) in zip(range(1, count + 1), itertools.cycle(SCRIPT)):
+        user_id = 1_000_000 + update_id % users
+        user = {'id': user_id, 'is_bot': False, 'first_name': 'Bench'}
+        message = {'message_id': update_id, 'date': now, 'chat': {'id': user_id, 'type': 'private'}, 'from': user}
+        if kind == 'text':
+            message['text'] = value
+            if value.startswith('/'):
+                message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(value)}]
+            yield {'update_id': update_id, 'message': message}
+        else:
+            yield {'update_id': update_id, 'callback_query': {
+                'id': str(update_id), 'from': user, 'chat_instance': str(user_id), 'data': value, 'message': message,
+            }}
+
+
+def load_updates(path: str):
+    with open(path, encoding='utf-8') as updates_file:
+        return [json.loads(line) for line in updates_file if line.strip()]
+
+
+async def replay(updates, concurrency: int, max_handlers: int, api_latency: float) -> dict:
+    from aiogram import Bot, Dispatcher
+    from handlers.callback_handlers import callback_router
+    from handlers.text_handlers import text_router
+    from handlers.user_commands import user_commands_router
+    from handlers.video_handlers import video_router
+    from webhook import create_app, start_server
+    import config
+
+    dp = Dispatcher()
+    dp.include_routers(user_commands_router, text_router, callback_router, video_router)
+    session = FakeSession(latency=api_latency)
+    bot = Bot(token='42:replay', session=session)
+
+    app = create_app(dp, bot, max_handlers=max_handlers, record_path='')
+    handler = app['webhook_handler']
+    runner = await start_server(app, host='127.0.0.1', port=0)
+    host, port = runner.addresses[0][:2]
+    url = f"http://{host}:{port}{config.WEBHOOK_PATH}"
+    headers = {'X-Telegram-Bot-Api-Secret-Token': config.WEBHOOK_SECRET} if config.WEBHOOK_SECRET else {}
+
+    statuses = {}
+    queue = iter(updates)
+
+    async def client(http: aiohttp.ClientSession):
+        for update in queue:
+            async with http.post(url, json=update, headers=headers) as response:
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+
+    started = time.perf_counter()
+    async with aiohttp.ClientSession() as http:                                 # keep-alive: одно соединение на клиента
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+    accepted_seconds = time.perf_counter() - started
+    while handler.in_flight:
+        await asyncio.sleep(0.001)
+    processed_seconds = time.perf_counter() - started
+
+    metrics = handler.metrics()
+    await runner.cleanup()
+    return {
+        'updates': len(updates),
+        'concurrency': concurrency,
+        'max_handlers': max_handlers,
+        'api_latency': api_latency,
+        'statuses': statuses,
+        'accepted_per_sec': round(len(updates) / accepted_seconds),
+        'processed_per_sec': round(metrics['processed'] / processed_seconds),
+        'api_calls': session.requests,
+        **metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--updates', help='JSONL с записанными обновлениями')
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=40)
+    parser.add_argument('--max-handlers', type=int, default=100)
+    parser.add_argument('--api-latency', type=float, default=0.0, help='имитация задержки ответа API, с')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)                                            # Лог на каждый запрос исказит замер
+
+    updates = load_updates(args.updates) if args.updates else list(synthetic_updates(args.count, args.users))
+    os.chdir(tempfile.mkdtemp(prefix='replay_'))                                # Базы результатов и т.п. - во временной папке
+    result = asyncio.run(replay(updates, args.concurrency, args.max_handlers, args.api_latency))
+    print(json.dumps(result, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+import os
+import sys
+import resource
+import multiprocessing
+from typing import Any, Callable, Dict
+
+BOT_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'bot')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+import cv2
+import numpy as np
+
+
+def make_synthetic_video(path: str, seconds: float = 10, fps: float = 30,
+                         width: int = 1280, height: int = 720, still_fraction: float = 0.0) -> str:
+    # Простая сцена: шум фона + движущийся "маятник", чтобы кодеку было что сжимать.
+    # still_fraction - доля видео в начале, где маятник стоит (пауза перед подходом)
+    if os.path.exists(path):
+        return path
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    if not writer.isOpened():
+        raise RuntimeError(f"Не удалось создать видео {path}")
+
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 60, (height, width, 3), dtype=np.uint8)
+    total = int(seconds * fps)
+    for i in range(total):
+        frame = background.copy()
+        phase = np.sin(2 * np.pi * max(0, i - still_fraction * total) / (fps * 2.0))
+        cx = width // 2
+        cy = int(height * (0.5 + 0.25 * phase))
+        cv2.circle(frame, (cx, cy), max(8, height // 12), (220, 200, 180), -1)
+        cv2.line(frame, (cx, cy), (cx, height - 10), (200, 200, 200), max(2, width // 200))
+        cv2.putText(frame, f"{i:05d}", (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss в Linux - килобайты
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _child(fn: Callable[..., Dict[str, Any]], args: tuple, queue) -> None:
+    try:
+        result = fn(*args)
+        result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+        queue.put(result)
+    except BaseException as e:
+        queue.put({'error': repr(e)})
+
+
+def run_isolated(fn: Callable[..., Dict[str, Any]], *args) -> Dict[str, Any]:
+    # Каждый вариант - в отдельном процессе, чтобы пиковый RSS не смешивался
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_child, args=(fn, args, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
@@ -0,0 +1,101 @@
+import asyncio
+import itertools
+import os
+import shutil
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import List, Optional, Tuple, Union
+
+from common import BOT_DIR  # noqa: F401  (добавляет bot/ в sys.path)
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import TelegramMethod
+from aiogram.types import Chat, Message
+
+_user_ids = itertools.count(1_000_000)
+
+
+class FakeBot:
+    # Вместо Telegram API: "скачивание" - копирование локального файла с заданной скоростью
+    id = 42
+
+    def __init__(self, source_path: str, bandwidth_mb_s: Optional[float] = None):
+        self.source_path = source_path
+        self.bandwidth_mb_s = bandwidth_mb_s
+
+    async def get_file(self, file_id: str):
+        return SimpleNamespace(file_id=file_id, file_path=f"videos/{file_id}.mp4")
+
+    async def download_file(self, file_path: str, destination, timeout: int = 30,
+                            chunk_size: int = 65536, seek: bool = True):
+        if self.bandwidth_mb_s:
+            await asyncio.sleep(os.path.getsize(self.source_path) / (self.bandwidth_mb_s * 1024 * 1024))
+        if isinstance(destination, (str, os.PathLike)):
+            await asyncio.to_thread(shutil.copyfile, self.source_path, destination)
+        else:
+            with open(self.source_path, 'rb') as source:
+                while chunk := source.read(chunk_size):
+                    destination.write(chunk)
+            if seek:
+                destination.seek(0)
+        return destination
+
+
+class FakeMessage:
+    def __init__(self, bot: FakeBot, duration: int, user_id: Optional[int] = None, reply_latency: float = 0.0):
+        self.bot = bot
+        self.reply_latency = reply_latency                                      # Сетевая задержка sendMessage
+        self.from_user = SimpleNamespace(id=user_id or next(_user_ids), first_name='Bench')
+        self.chat = SimpleNamespace(id=self.from_user.id)
+        file_size = os.path.getsize(bot.source_path)
+        self.video = SimpleNamespace(
+            file_id=f"file_{self.from_user.id}",
+            file_unique_id=f"unique_{self.from_user.id}",
+            duration=duration,
+            file_size=file_size,
+            mime_type='video/mp4',
+        )
+        self.created_at = time.perf_counter()
+        self.replies: List[Tuple[float, str]] = []
+
+    async def answer(self, text: str, **kwargs):
+        if self.reply_latency:
+            await asyncio.sleep(self.reply_latency)
+        self.replies.append((time.perf_counter() - self.created_at, text))
+        return SimpleNamespace(message_id=len(self.replies), text=text)
+
+
+def make_state(bot: FakeBot, user_id: int, storage: Optional[BaseStorage] = None) -> FSMContext:
+    storage = storage or MemoryStorage()
+    return FSMContext(storage=storage, key=StorageKey(bot_id=bot.id, chat_id=user_id, user_id=user_id))
+
+
+class FakeSession(BaseSession):
+    # Сессия aiogram без сети: на любой метод API отвечает правдоподобной заглушкой
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.requests = 0
+        self._message_ids = itertools.count(1)
+
+    async def make_request(self, bot, method: TelegramMethod, timeout=None):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        returning = method.__returning__
+        if returning is bool or returning == Union[Message, bool]:
+            return True
+        if returning is Message:
+            chat_id = getattr(method, 'chat_id', 0) or 0
+            return Message(message_id=next(self._message_ids), date=datetime.now(),
+                           chat=Chat(id=chat_id, type='private'), text=getattr(method, 'text', None)).as_(bot)
+        raise NotImplementedError(f"FakeSession не умеет отвечать на {type(method).__name__}")
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b''
+
+    async def close(self):
+        pass
@@ -1,77 +1,199 @@
 import cv2
 import os
 from tqdm import tqdm
-import glob
 import logging
-import time
+import tempfile
+import numpy as np
+from typing import Callable, Iterator, NamedTuple, Optional, Tuple
 
-logger = logging.getLogger(__name__)
+import config
+from video_errors import VideoOpenError
 
-def save_frames(local_file_path: str):
-    time.sleep(5)
-    video_path = local_file_path                                                # Создаем папку (открываем)
-    video_filename = local_file_path[-31:-4]
+logger = logging.getLogger(__name__)
 
-    os.makedirs('frames', exist_ok=True)
-    logger.info("📁 Папка 'frames' готова для сохранения кадров")
+SAMPLE_FPS = 1.0                # Сколько кадров в секунду видео отдаем на анализ
+DEFAULT_FPS = 30.0              # Если контейнер не сообщает FPS
+SEEK_MIN_INTERVAL = 1.0         # С какого шага (сек) перемотка дешевле: у телефонных видео ключевой кадр ~раз в секунду
+SAMPLING_MODES = ('read', 'grab', 'seek', 'auto')
 
 
-    old_frames = glob.glob(os.path.join('frames', '*_frame_*.jpg'))             # Удаляем старые кадры
-    deleted_count = 0
-    for file_path in old_frames:
-        try:
-            if os.path.isfile(file_path):
-                os.remove(file_path)
-                deleted_count += 1
-        except Exception as e:
-            logger.error(f"❌ Ошибка при удалении {file_path}: {e}")
+class VideoInfo(NamedTuple):
+    fps: float
+    frame_count: int
+    width: int
+    height: int
 
-    logger.info(f"🗑️ Удалено {deleted_count} старых кадров из папки 'frames'")
+    @property
+    def duration(self) -> float:
+        return self.frame_count / self.fps if self.frame_count > 0 else 0.0
 
 
-    cap = cv2.VideoCapture(video_path)                                          # Начинаем обработку видео
+def open_video(video_path: str) -> cv2.VideoCapture:
+    cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
+        cap.release()
         logger.error(f"❌ Ошибка: Не могу открыть видеофайл: {video_path}")
-        exit()  # завершаем программу если ошибка
-    logger.info("✅ Видеофайл успешно открыт!")
-
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-    frame_count = 0
-    saved_count = 0
-    every_n_frame = 30
-
-    progress_bar = tqdm(total=total_frames, desc="Обработка видео")             # Извлекаем кадры
-
-    while True:    
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_count+=1
-        progress_bar.update(1)
-
-        if frame_count%every_n_frame==0:
-
-
-            filename = f"{video_filename}_frame_{saved_count:04d}.jpg"
-            filepath = os.path.join('frames', filename)   
-            success = cv2.imwrite(filepath, frame)    
-
-            if success:
-                saved_count+=1
+        raise VideoOpenError(f"Не могу открыть видеофайл: {video_path}")
+    return cap
+
+
+def get_video_info(cap: cv2.VideoCapture) -> VideoInfo:
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if not fps or fps != fps or fps > 1000:                                      # 0, NaN или мусор из контейнера
+        fps = DEFAULT_FPS
+    return VideoInfo(
+        fps=fps,
+        frame_count=int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+        width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    )
+
+
+def probe_video(video_path: str) -> VideoInfo:
+    cap = open_video(video_path)
+    try:
+        return get_video_info(cap)
+    finally:
+        cap.release()
+
+
+def plan_sampling(info: VideoInfo, sample_fps: float = SAMPLE_FPS,
+                  every_n_frame: Optional[int] = None, mode: str = 'auto') -> Tuple[int, str]:
+    # Шаг выборки считаем от времени видео, а не от фиксированных 30 кадров
+    if mode not in SAMPLING_MODES:
+        raise ValueError(f"Неизвестный режим выборки кадров: {mode}")
+
+    stride = every_n_frame or max(1, int(round(info.fps / sample_fps)))
+    if mode == 'auto':
+        if stride == 1:
+            mode = 'read'
+        elif info.frame_count > 0 and stride >= SEEK_MIN_INTERVAL * info.fps:
+            mode = 'seek'
+        else:
+            mode = 'grab'
+    elif mode == 'seek' and info.frame_count <= 0:                               # Без длины перематывать некуда
+        mode = 'grab'
+    return stride, mode
+
+
+def _iter_capture(cap: cv2.VideoCapture, stride: int, mode: str, frame_count: int,
+                  cancel_check: Optional[Callable[[], None]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    # cancel_check бросает исключение, если задачу отменили - проверяем на каждом кадре
+    progress_bar = tqdm(total=frame_count, desc="Обработка видео", disable=not config.PROGRESS_BARS)
+
+    try:
+        if mode == 'seek':
+            for frame_index in range(0, frame_count, stride):
+                if cancel_check is not None:
+                    cancel_check()
+                if frame_index and not cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index):
+                    break
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                progress_bar.update(min(stride, frame_count - frame_index))
+                yield frame_index, frame
+            return
+
+        frame_index = 0
+        while True:
+            if cancel_check is not None:
+                cancel_check()
+            keep = frame_index % stride == 0
+            if mode == 'read':
+                ret, frame = cap.read()
             else:
-                logger.error(f"❌ Ошибка сохранения кадра {saved_count}")
-
-    progress_bar.close()
-    cap.release()
-
-    # ОСВОБОЖДАЕМ ВИДЕОПЛЕЕР (обязательно!)
-    cap.release()
+                ret = cap.grab()                                                 # Пропущенные кадры не конвертируем
+                if ret and keep:
+                    ret, frame = cap.retrieve()
+            if not ret:
+                break
+
+            progress_bar.update(1)
+            if keep:
+                yield frame_index, frame
+            frame_index += 1
+    finally:
+        progress_bar.close()
+
+
+def iter_frames(video_path: str, sample_fps: float = SAMPLE_FPS, every_n_frame: Optional[int] = None,
+                mode: str = 'auto', cancel_check: Optional[Callable[[], None]] = None) -> Iterator[Tuple[int, np.ndarray]]:
+    # Отдаем выбранные кадры (индекс, BGR-массив) по одному, без записи на диск
+    cap = open_video(video_path)
+    try:
+        info = get_video_info(cap)
+        stride, mode = plan_sampling(info, sample_fps, every_n_frame, mode)
+        logger.info(f"🎞️ Выборка кадров: каждый {stride}-й, режим '{mode}'")
+        yield from _iter_capture(cap, stride, mode, info.frame_count, cancel_check)
+    finally:
+        cap.release()
+
+
+def read_frames_batch(video_path: str, sample_fps: float = SAMPLE_FPS, every_n_frame: Optional[int] = None,
+                      mode: str = 'auto', out: Optional[np.ndarray] = None,
+                      cancel_check: Optional[Callable[[], None]] = None) -> np.ndarray:
+    # Собираем выбранные кадры в один заранее выделенный массив (N, H, W, 3)
+    cap = open_video(video_path)
+    try:
+        info = get_video_info(cap)
+        stride, mode = plan_sampling(info, sample_fps, every_n_frame, mode)
+        capacity = max(1, -(-info.frame_count // stride))
+
+        batch = out
+        if batch is None or batch.shape[1:] != (info.height, info.width, 3):
+            batch = np.empty((capacity, info.height, info.width, 3), dtype=np.uint8)
+
+        count = 0
+        for _, frame in _iter_capture(cap, stride, mode, info.frame_count, cancel_check):
+            if count == len(batch):                                             # CAP_PROP_FRAME_COUNT - только оценка
+                batch = np.concatenate([batch, np.empty_like(batch)])
+            batch[count] = frame
+            count += 1
+    finally:
+        cap.release()
+
+    return batch[:count]
+
+
+class JpegFrameSink:
+    # Отладочный приемник: сохраняет кадры в JPEG, как раньше делал save_frames.
+    # У каждой задачи своя подпапка - параллельные воркеры не удаляют чужие кадры; старые убирает maintenance
+    def __init__(self, prefix: str, frames_dir: str = config.FRAMES_DIR):
+        self.prefix = prefix
+        self.saved_count = 0
+
+        os.makedirs(frames_dir, exist_ok=True)
+        self.out_dir = tempfile.mkdtemp(prefix=f"{prefix}_", dir=frames_dir)
+        logger.info(f"📁 Папка '{self.out_dir}' готова для сохранения кадров")
+
+    def __call__(self, frame_index: int, frame: np.ndarray) -> bool:
+        filename = f"{self.prefix}_frame_{self.saved_count:04d}.jpg"
+        success = cv2.imwrite(os.path.join(self.out_dir, filename), frame)
+        if success:
+            self.saved_count += 1
+        else:
+            logger.error(f"❌ Ошибка сохранения кадра {frame_index}")
+        return success
+
+
+def save_frames(local_file_path: str, sample_fps: float = SAMPLE_FPS, mode: str = 'auto',
+                debug_sink: Optional[Callable[[int, np.ndarray], bool]] = None,
+                dump_frames: bool = False, cancel_check: Optional[Callable[[], None]] = None) -> int:
+    if dump_frames and debug_sink is None:
+        video_filename = os.path.splitext(os.path.basename(local_file_path))[0]
+        debug_sink = JpegFrameSink(video_filename)
+
+    sampled_count = 0
+    for frame_index, frame in iter_frames(local_file_path, sample_fps, mode=mode, cancel_check=cancel_check):
+        sampled_count += 1
+        if debug_sink is not None:
+            debug_sink(frame_index, frame)
 
     logger.info("✅ Обработка завершена!")
     logger.info(f"📊 Результаты:")
-    logger.info(f"   Прочитано кадров: {frame_count}")
-    logger.info(f"   Сохранено кадров: {saved_count}")
-    logger.info(f"   Кадры сохранены в папку: frames/")
+    logger.info(f"   Выбрано кадров: {sampled_count}")
+    if isinstance(debug_sink, JpegFrameSink):
+        logger.info(f"   Кадры сохранены в папку: {debug_sink.out_dir}/")
 
+    return sampled_count
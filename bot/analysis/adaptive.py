@@ -0,0 +1,122 @@
+import cv2
+import logging
+import time
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+from analysis.kinematics import EXERCISE_JOINTS, joint_angles, smooth_angles, summarize_reps
+from analysis.pose import NUM_LANDMARKS, PoseTrack, detect_landmarks, downscale, load_pose_model
+from analysis.timing import add_timing
+from OpenCV import iter_frames, plan_sampling, probe_video
+
+logger = logging.getLogger(__name__)
+
+MOTION_THUMB_SIZE = 32          # Сравниваем кадры в миниатюре: шум сенсора усредняется, стоит копейки
+MOTION_PIXEL_DELTA = 10         # Пиксель миниатюры изменился, если яркость сдвинулась больше чем на это (0-255)
+MOTION_MIN_CHANGED = 0.005      # Движение есть, если изменилось больше этой доли пикселей (~5 из 1024)
+MAX_STILL_SECONDS = 2.0         # Даже в неподвижном сегменте перепроверяем позу не реже этого
+EARLY_EXIT_REPS = 8             # Сколько повторений достаточно для оценки техники
+EARLY_EXIT_MAX_CV = 0.15        # ... если их амплитуды стабильны
+EARLY_EXIT_MIN_VISIBLE = 0.9    # ... и рабочий сустав виден почти на всех кадрах
+EARLY_EXIT_CHECK_SECONDS = 2.0  # Как часто (по времени видео) проверять условие остановки
+
+
+def motion_thumbnail(frame: np.ndarray) -> np.ndarray:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return cv2.resize(gray, (MOTION_THUMB_SIZE, MOTION_THUMB_SIZE), interpolation=cv2.INTER_AREA).astype(np.int16)
+
+
+def stable_rep_period(landmarks: np.ndarray, fps: float, aspect: float) -> Optional[float]:
+    # Период повторения (с), если повторений уже достаточно и они стабильны; иначе None
+    angles = joint_angles(landmarks, aspect)
+    if not np.isfinite(angles[:, :3]).any():
+        return None
+    primary_joint, reps = summarize_reps(smooth_angles(angles, fps), fps)
+    if len(reps.bottoms) < EARLY_EXIT_REPS:
+        return None
+
+    recent = reps.amplitudes[-EARLY_EXIT_REPS:]
+    if np.std(recent) / (np.mean(recent) + 1e-9) > EARLY_EXIT_MAX_CV:
+        return None
+    visible = np.isfinite(angles[:, EXERCISE_JOINTS.index(primary_joint)]).mean()
+    if visible < EARLY_EXIT_MIN_VISIBLE:
+        return None
+    return float(np.median(np.diff(reps.bottoms))) / fps
+
+
+def extract_pose_adaptive(video_path: str, sample_fps: float,
+                          cancel_check: Optional[Callable[[], None]] = None,
+                          timings: Optional[Dict[str, float]] = None) -> Tuple[PoseTrack, Dict]:
+    # Как extract_pose, но кадр сразу уменьшается до входа модели, неподвижные участки
+    # не отдаются в модель (поза копируется), а при стабильных повторениях декодирование прекращается
+    info = probe_video(video_path)
+    stride, mode = plan_sampling(info, sample_fps)
+    track_fps = info.fps / stride
+    aspect = info.width / max(info.height, 1)
+    max_still = max(1, int(MAX_STILL_SECONDS * track_fps))
+    check_every = max(1, int(EARLY_EXIT_CHECK_SECONDS * track_fps))
+
+    pose = load_pose_model()
+    pose.reset()
+    landmarks = np.full((max(1, -(-info.frame_count // stride)), NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+
+    started = time.perf_counter()
+    count = skipped = analysed = 0
+    inference = checks = 0.0
+    last_index = -1
+    last_analysed = -max_still
+    reference = None
+    rep_period = None
+    frames = iter_frames(video_path, every_n_frame=stride, mode=mode, cancel_check=cancel_check)
+    try:
+        for frame_index, frame in frames:
+            if count == len(landmarks):
+                landmarks = np.concatenate([landmarks, np.full_like(landmarks, np.nan)])
+            last_index = frame_index
+
+            small = downscale(frame)                                            # Полноразмерный кадр дальше не нужен
+            thumbnail = motion_thumbnail(small)
+            still = (reference is not None and count - last_analysed < max_still
+                     and (np.abs(thumbnail - reference) > MOTION_PIXEL_DELTA).mean() <= MOTION_MIN_CHANGED)
+            if still:
+                landmarks[count] = landmarks[count - 1]
+                skipped += 1
+            else:
+                inference_started = time.perf_counter()
+                points = detect_landmarks(pose, small)
+                inference += time.perf_counter() - inference_started
+                if points is not None:
+                    landmarks[count] = points
+                reference = thumbnail                                           # Сравниваем с последним проанализированным
+                last_analysed = count
+                analysed += 1
+            count += 1
+
+            if count % check_every == 0:
+                check_started = time.perf_counter()
+                rep_period = stable_rep_period(landmarks[:count], track_fps, aspect)
+                checks += time.perf_counter() - check_started
+                if rep_period is not None:
+                    break
+    finally:
+        frames.close()
+
+    add_timing(timings, 'inference', inference)
+    add_timing(timings, 'scoring', checks)                                      # Проверки ранней остановки - тот же подсчет повторений
+    add_timing(timings, 'decode', time.perf_counter() - started - inference - checks)
+
+    track = PoseTrack(landmarks[:count], track_fps, info.width, info.height)
+    stats = {
+        'frames_decoded': count if mode == 'seek' else last_index + 1,
+        'frames_skipped': skipped,
+        'frames_analysed': analysed,
+        'early_exit': rep_period is not None,
+        'analysed_seconds': round((last_index + 1) / info.fps, 2),
+        'video_seconds': round(info.duration, 2),
+    }
+    logger.info(
+        f"🦴 Адаптивный анализ: декодировано {stats['frames_decoded']}, пропущено {skipped}, "
+        f"в модель {analysed} кадров за {time.perf_counter() - started:.2f} с"
+        + (f", остановка на {stats['analysed_seconds']} с" if rep_period is not None else "")
+    )
+    return track, stats
@@ -0,0 +1,166 @@
+import numpy as np
+from scipy.signal import find_peaks, peak_widths, savgol_filter
+from typing import Dict, NamedTuple, Tuple
+
+JOINT_NAMES = ('knee', 'hip', 'elbow', 'back')
+
+# Тройки точек MediaPipe (a, вершина, b): сначала левая сторона, затем правая
+_TRIPLETS = np.array([
+    (23, 25, 27), (24, 26, 28),                                                 # колено: бедро-колено-голеностоп
+    (11, 23, 25), (12, 24, 26),                                                 # таз: плечо-бедро-колено
+    (11, 13, 15), (12, 14, 16),                                                 # локоть: плечо-локоть-запястье
+])
+_SHOULDERS = np.array([11, 12])
+_HIPS = np.array([23, 24])
+
+MIN_VISIBILITY = 0.5
+SMOOTH_SECONDS = 0.3
+MIN_REP_SECONDS = 0.8
+MIN_REP_AMPLITUDE = 25.0        # градусы
+FULL_RANGE = {'knee': 90.0, 'hip': 80.0, 'elbow': 70.0}
+EXERCISE_JOINTS = ('knee', 'hip', 'elbow')
+
+
+class RepStats(NamedTuple):
+    bottoms: np.ndarray         # индексы кадров нижней точки каждого повторения
+    amplitudes: np.ndarray      # градусы
+    tempos: np.ndarray          # секунды на повторение
+
+
+def joint_angles(landmarks: np.ndarray, aspect: float = 1.0,
+                 min_visibility: float = MIN_VISIBILITY) -> np.ndarray:
+    # (T, 33, 4) -> (T, 4) углов в градусах в порядке JOINT_NAMES, NaN где точки не видны
+    points = landmarks[..., :2] * np.array([aspect, 1.0], dtype=landmarks.dtype)
+    visibility = landmarks[..., 3]
+
+    a = points[:, _TRIPLETS[:, 0]]
+    vertex = points[:, _TRIPLETS[:, 1]]
+    b = points[:, _TRIPLETS[:, 2]]
+    u = a - vertex
+    v = b - vertex
+    norms = np.sqrt(np.einsum('tjk,tjk->tj', u, u) * np.einsum('tjk,tjk->tj', v, v))
+    cos = np.einsum('tjk,tjk->tj', u, v) / (norms + 1e-9)
+    side_angles = np.degrees(np.arccos(np.clip(cos, -1.0, 1.0)))               # (T, 6)
+
+    side_visibility = visibility[:, _TRIPLETS].min(axis=-1)                    # (T, 6)
+    weights = np.where(side_visibility >= min_visibility, side_visibility, 0.0)
+    weights = weights.reshape(-1, 3, 2)
+    side_angles = np.nan_to_num(side_angles).reshape(-1, 3, 2)
+    total = weights.sum(axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        limbs = np.where(total > 0, (side_angles * weights).sum(axis=-1) / total, np.nan)
+
+    torso = points[:, _SHOULDERS].mean(axis=1) - points[:, _HIPS].mean(axis=1)  # наклон корпуса от вертикали
+    back = np.degrees(np.arctan2(np.abs(torso[:, 0]), -torso[:, 1]))
+    torso_visible = visibility[:, np.concatenate([_SHOULDERS, _HIPS])].min(axis=1) >= min_visibility
+    back = np.where(torso_visible, back, np.nan)
+
+    return np.column_stack([limbs, back]).astype(np.float32)
+
+
+def fill_gaps(series: np.ndarray) -> np.ndarray:
+    # Линейная интерполяция пропусков по каждому столбцу (цикл только по суставам)
+    filled = series.copy()
+    index = np.arange(len(series))
+    for column in range(series.shape[1]):
+        known = np.isfinite(series[:, column])
+        if known.any() and not known.all():
+            filled[:, column] = np.interp(index, index[known], series[known, column])
+    return filled
+
+
+def smooth_angles(angles: np.ndarray, fps: float, seconds: float = SMOOTH_SECONDS) -> np.ndarray:
+    filled = fill_gaps(angles)
+    window = int(seconds * fps) | 1
+    if window < 5 or len(filled) <= window:
+        return filled
+    return savgol_filter(filled, window, polyorder=2, axis=0)
+
+
+def detect_reps(signal: np.ndarray, fps: float) -> RepStats:
+    # Повторение = провал угла (сгибание); амплитуда - prominence, темп - удвоенная ширина на половине провала
+    if len(signal) < 3 or not np.isfinite(signal).any():
+        empty = np.empty(0)
+        return RepStats(empty.astype(int), empty, empty)
+
+    inverted = -np.nan_to_num(signal, nan=np.nanmean(signal))
+    bottoms, properties = find_peaks(
+        inverted,
+        prominence=MIN_REP_AMPLITUDE,
+        distance=max(1, int(MIN_REP_SECONDS * fps)),
+    )
+    half_widths = peak_widths(inverted, bottoms, rel_height=0.5, prominence_data=(
+        properties['prominences'], properties['left_bases'], properties['right_bases']
+    ))[0]
+    return RepStats(bottoms, properties['prominences'], 2 * half_widths / fps)
+
+
+def _coefficient_of_variation(values: np.ndarray) -> float:
+    if len(values) < 2:
+        return 0.0
+    return float(np.std(values) / (np.mean(values) + 1e-9))
+
+
+def summarize_reps(angles: np.ndarray, fps: float) -> Tuple[str, RepStats]:
+    # Рабочий сустав - тот, у которого наибольший размах движения
+    low, high = np.percentile(angles[:, :3], [5, 95], axis=0)                  # после fill_gaps NaN только у невидимых суставов
+    spans = high - low
+    primary = int(np.nanargmax(np.nan_to_num(spans, nan=-1.0)))
+    return EXERCISE_JOINTS[primary], detect_reps(angles[:, primary], fps)
+
+
+def score_technique(landmarks: np.ndarray, fps: float, aspect: float = 1.0) -> Dict:
+    angles = joint_angles(landmarks, aspect)
+    if not np.isfinite(angles[:, :3]).any():
+        return {'reps': 0, 'technique_score': 0, 'amplitude': '—', 'speed': '—',
+                'recommendation': 'Не удалось определить суставы. Снимите упражнение целиком.',
+                'primary_joint': None}
+
+    smoothed = smooth_angles(angles, fps)
+    primary_joint, reps = summarize_reps(smoothed, fps)
+    if len(reps.bottoms) == 0:
+        return {'reps': 0, 'technique_score': 0, 'amplitude': '—', 'speed': '—',
+                'recommendation': 'Не удалось выделить повторения. Сделайте несколько полных повторений.',
+                'primary_joint': primary_joint}
+
+    amplitude_ratio = min(1.0, float(reps.amplitudes.mean()) / FULL_RANGE[primary_joint])
+    amplitude_consistency = max(0.0, 1.0 - _coefficient_of_variation(reps.amplitudes))
+    tempo_consistency = max(0.0, 1.0 - _coefficient_of_variation(reps.tempos))
+    back = smoothed[:, 3]
+    back_range = float(np.nanmax(back) - np.nanmin(back)) if np.isfinite(back).any() else 0.0
+    back_stability = max(0.0, 1.0 - back_range / 60.0)
+
+    components = {
+        'amplitude': (0.4, amplitude_ratio, 'Увеличьте амплитуду движения'),
+        'consistency': (0.3, amplitude_consistency, 'Старайтесь делать повторения одинаково'),
+        'tempo': (0.15, tempo_consistency, 'Держите ровный темп'),
+        'back': (0.15, back_stability, 'Следите за положением спины'),
+    }
+    score = sum(weight * value for weight, value, _ in components.values())
+    weakest = min(components.values(), key=lambda item: item[1])
+
+    mean_tempo = float(reps.tempos.mean())
+    if mean_tempo < 1.2:
+        speed = 'Быстрая'
+    elif mean_tempo > 4.0:
+        speed = 'Медленная'
+    else:
+        speed = 'Нормальная'
+
+    if amplitude_ratio >= 0.85:
+        amplitude = 'Хорошо'
+    elif amplitude_ratio >= 0.6:
+        amplitude = 'Средне'
+    else:
+        amplitude = 'Недостаточно'
+
+    return {
+        'reps': int(len(reps.bottoms)),
+        'technique_score': int(round(100 * score)),
+        'amplitude': amplitude,
+        'speed': speed,
+        'recommendation': weakest[2] if weakest[1] < 0.9 else 'Отличная техника, так держать!',
+        'primary_joint': primary_joint,
+        'amplitude_deg': round(float(reps.amplitudes.mean()), 1),
+        'tempo_sec': round(mean_tempo, 2),
+    }
@@ -0,0 +1,45 @@
+import logging
+import time
+from typing import Callable, Dict, Optional
+
+import config
+from analysis.adaptive import extract_pose_adaptive
+from analysis.kinematics import score_technique
+from analysis.pose import POSE_SAMPLE_FPS, PoseTrack, extract_pose
+from analysis.timing import add_timing
+from OpenCV import VideoOpenError
+
+logger = logging.getLogger(__name__)
+
+
+def analyze_video(video_path: str, sample_fps: float = POSE_SAMPLE_FPS,
+                  cancel_check: Optional[Callable[[], None]] = None,
+                  adaptive: bool = config.ADAPTIVE_ANALYSIS) -> Dict:
+    # Точка входа для пула процессов: видео -> готовые метрики техники
+    stats = {}
+    timings = {}
+    try:
+        if adaptive:
+            track, stats = extract_pose_adaptive(video_path, sample_fps, cancel_check, timings)
+        else:
+            track = extract_pose(video_path, sample_fps, cancel_check, timings)
+    except VideoOpenError:                                                      # Контейнер не открывается - сразу отказ
+        return {'frames': 0, 'detected_frames': 0, 'unreadable': True}
+
+    result = score_track(track, timings)
+    result.update(stats)
+    result['stage_seconds'] = timings                                           # reps - только просмотренная часть (см. early_exit)
+    return result
+
+
+def score_track(track: PoseTrack, timings: Optional[Dict[str, float]] = None) -> Dict:
+    result = {'frames': len(track.landmarks), 'detected_frames': track.detected_frames}
+    if track.detected_frames == 0:
+        return result
+
+    started = time.perf_counter()
+    result.update(score_technique(track.landmarks, track.fps, track.width / max(track.height, 1)))
+    elapsed = time.perf_counter() - started
+    add_timing(timings, 'scoring', elapsed)
+    logger.info(f"📐 Метрики техники посчитаны за {elapsed * 1000:.1f} мс")
+    return result
@@ -0,0 +1,100 @@
+import cv2
+import logging
+import time
+import numpy as np
+from typing import Callable, Dict, Iterable, Optional
+
+from analysis.timing import add_timing
+from analysis.tracks import NUM_LANDMARKS, POSE_INPUT_SIZE, PoseTrack
+from OpenCV import iter_frames, plan_sampling, probe_video
+
+logger = logging.getLogger(__name__)
+
+POSE_SAMPLE_FPS = 10.0          # Для подсчета повторений нужно ~10 поз в секунду
+MODEL_COMPLEXITY = 1
+
+_pose_model = None
+
+
+def load_pose_model():
+    # Модель создается один раз на процесс и переиспользуется между видео
+    global _pose_model
+    if _pose_model is None:
+        import mediapipe as mp
+
+        started = time.perf_counter()
+        _pose_model = mp.solutions.pose.Pose(
+            static_image_mode=False,
+            model_complexity=MODEL_COMPLEXITY,
+            smooth_landmarks=True,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5,
+        )
+        logger.info(f"🧠 Модель позы загружена за {time.perf_counter() - started:.2f} с")
+    return _pose_model
+
+
+def init_pose_worker():
+    # initializer для ProcessPoolExecutor
+    load_pose_model()
+
+
+def downscale(frame: np.ndarray, max_side: int = POSE_INPUT_SIZE) -> np.ndarray:
+    height, width = frame.shape[:2]
+    scale = max_side / max(height, width)
+    if scale >= 1:
+        return frame
+    return cv2.resize(frame, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+
+
+def detect_landmarks(pose, frame: np.ndarray) -> Optional[np.ndarray]:
+    # Один уже уменьшенный BGR-кадр -> (33, 4) или None, если человека нет
+    result = pose.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+    if not result.pose_landmarks:
+        return None
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in result.pose_landmarks.landmark], dtype=np.float32)
+
+
+def estimate_landmarks(frames: Iterable[np.ndarray], capacity: int = 0,
+                       timings: Optional[Dict[str, float]] = None) -> np.ndarray:
+    pose = load_pose_model()
+    pose.reset()                                                                # Трекинг не должен переходить между видео
+
+    landmarks = np.full((max(capacity, 1), NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    count = 0
+    inference = 0.0
+    started = time.perf_counter()
+    for frame in frames:
+        if count == len(landmarks):
+            landmarks = np.concatenate([landmarks, np.full_like(landmarks, np.nan)])
+
+        small = downscale(frame)
+        inference_started = time.perf_counter()
+        points = detect_landmarks(pose, small)
+        inference += time.perf_counter() - inference_started
+        if points is not None:
+            landmarks[count] = points
+        count += 1
+
+    add_timing(timings, 'inference', inference)
+    add_timing(timings, 'decode', time.perf_counter() - started - inference)   # Остальное время цикла - получение кадров
+    return landmarks[:count]
+
+
+def extract_pose(video_path: str, sample_fps: float = POSE_SAMPLE_FPS,
+                 cancel_check: Optional[Callable[[], None]] = None,
+                 timings: Optional[Dict[str, float]] = None) -> PoseTrack:
+    # Точка входа для ProcessPoolExecutor: видео -> массив поз (кадры, 33, 4)
+    info = probe_video(video_path)
+    stride, _ = plan_sampling(info, sample_fps)
+
+    started = time.perf_counter()
+    frames = (frame for _, frame in iter_frames(video_path, every_n_frame=stride, cancel_check=cancel_check))
+    landmarks = estimate_landmarks(frames, capacity=-(-info.frame_count // stride), timings=timings)
+    track = PoseTrack(landmarks, info.fps / stride, info.width, info.height)
+
+    logger.info(
+        f"🦴 Поза найдена на {track.detected_frames}/{len(landmarks)} кадрах "
+        f"за {time.perf_counter() - started:.2f} с"
+    )
+    return track
@@ -0,0 +1,91 @@
+import cv2
+import logging
+import math
+import time
+import numpy as np
+from typing import Callable, Dict, List, Optional
+
+from analysis.pipeline import score_track
+from analysis.pose import POSE_SAMPLE_FPS, detect_landmarks, downscale, load_pose_model
+from analysis.timing import add_timing
+from analysis.tracks import NUM_LANDMARKS, PoseTrack, SegmentTrack
+from OpenCV import get_video_info, open_video, plan_sampling
+
+logger = logging.getLogger(__name__)
+
+
+def extract_pose_segment(video_path: str, start: float, end: float, sample_fps: float = POSE_SAMPLE_FPS,
+                         cancel_check: Optional[Callable[[], None]] = None) -> SegmentTrack:
+    # Задача пула: позы на отрезке [start, end) секунд (end=inf - до конца файла); сетка кадров та же, что у extract_pose
+    cap = open_video(video_path)
+    try:
+        info = get_video_info(cap)
+        stride, _ = plan_sampling(info, sample_fps)
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+        frame_index = int(round(cap.get(cv2.CAP_PROP_POS_FRAMES)))
+        end_index = int(math.ceil(end * info.fps)) if math.isfinite(end) else math.inf
+        first_sample = -(-frame_index // stride)
+
+        pose = load_pose_model()
+        pose.reset()
+        expected_end = end_index if math.isfinite(end_index) else info.frame_count   # Нехватку добирает concatenate ниже
+        landmarks = np.full((max(1, -(-(expected_end - frame_index) // stride)), NUM_LANDMARKS, 4), np.nan,
+                            dtype=np.float32)
+        count = 0
+        inference = 0.0
+        started = time.perf_counter()
+        while frame_index < end_index:
+            if cancel_check is not None:
+                cancel_check()
+            if not cap.grab():
+                break
+            if frame_index % stride == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                if count == len(landmarks):
+                    landmarks = np.concatenate([landmarks, np.full_like(landmarks, np.nan)])
+                small = downscale(frame)
+                inference_started = time.perf_counter()
+                points = detect_landmarks(pose, small)
+                inference += time.perf_counter() - inference_started
+                if points is not None:
+                    landmarks[count] = points
+                count += 1
+            frame_index += 1
+    finally:
+        cap.release()
+
+    elapsed = time.perf_counter() - started
+    logger.info(f"🧩 Отрезок {start:.1f}-{end:.1f} с: {count} кадров за {elapsed:.2f} с")
+    timings = {'decode': elapsed - inference, 'inference': inference}
+    return SegmentTrack(first_sample, landmarks[:count], info.fps / stride, info.width, info.height, timings)
+
+
+def merge_segments(segments: List[SegmentTrack]) -> PoseTrack:
+    # Склейка по общей сетке кадров; на перекрытии приоритет у более раннего отрезка,
+    # поздний только заполняет пропуски (его начало - разгон трекера)
+    segments = sorted(segments, key=lambda segment: segment.first_sample)
+    first = segments[0].first_sample
+    total = max(segment.first_sample + len(segment.landmarks) for segment in segments) - first
+    merged = np.full((total, NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    for segment in segments:
+        offset = segment.first_sample - first
+        window = merged[offset:offset + len(segment.landmarks)]
+        missing = ~np.isfinite(window[:, 0, 0])
+        window[missing] = segment.landmarks[missing]
+    head = segments[0]
+    return PoseTrack(merged, head.fps, head.width, head.height)
+
+
+def score_segments(segments: List[SegmentTrack], cancel_check: Optional[Callable[[], None]] = None) -> Dict:
+    # Задача пула: повторения ищем по склеенному треку целиком, поэтому стык отрезков их не режет.
+    # Время этапов складывается по отрезкам - это процессорное время, а не задержка
+    timings = {}
+    for segment in segments:
+        for stage, seconds in segment.timings.items():
+            add_timing(timings, stage, seconds)
+    result = score_track(merge_segments(segments), timings)
+    result['stage_seconds'] = timings
+    return result
@@ -0,0 +1,74 @@
+import logging
+import time
+from typing import Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from analysis.pipeline import score_track
+from analysis.pose import POSE_SAMPLE_FPS, downscale, estimate_landmarks
+from analysis.tracks import PoseTrack
+from frame_ring import FrameRing, RingSpec
+from OpenCV import iter_frames, plan_sampling, probe_video
+
+logger = logging.getLogger(__name__)
+
+
+def decode_to_ring(spec: RingSpec, video_path: str, sample_fps: float = POSE_SAMPLE_FPS,
+                   cancel_check: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    # Задача пула - декодер: выбранные кадры, уменьшенные до входа модели, пишет в кольцо
+    ring = FrameRing.attach(spec)
+    waited = 0.0
+    try:
+        started = time.perf_counter()
+        info = probe_video(video_path)
+        stride, _ = plan_sampling(info, sample_fps)
+        for frame_index, frame in iter_frames(video_path, every_n_frame=stride, cancel_check=cancel_check):
+            small = downscale(frame)
+            put_started = time.perf_counter()
+            ring.put(frame_index, small, cancel_check)
+            waited += time.perf_counter() - put_started
+        ring.finish()
+    except BaseException:
+        ring.abort()                                                            # Анализ не должен ждать кадров, которых не будет
+        raise
+    finally:
+        ring.close()
+    return {'decode': time.perf_counter() - started - waited}                   # Без ожидания свободного слота
+
+
+def _ring_frames(ring: FrameRing, cancel_check: Optional[Callable[[], None]]) -> Iterator[np.ndarray]:
+    while True:
+        item = ring.get(cancel_check)
+        if item is None:
+            return
+        yield item[1]                                                           # View на слот, модель получает его без копии
+        ring.release()
+
+
+def analyze_ring(spec: RingSpec, video_path: str, sample_fps: float = POSE_SAMPLE_FPS,
+                 cancel_check: Optional[Callable[[], None]] = None) -> Dict:
+    # Задача пула - анализ: позы по кадрам из кольца, затем метрики техники как в analyze_video
+    ring = FrameRing.attach(spec)
+    frames = _ring_frames(ring, cancel_check)
+    timings = {}
+    try:
+        info = probe_video(video_path)
+        stride, _ = plan_sampling(info, sample_fps)
+        started = time.perf_counter()
+        landmarks = estimate_landmarks(frames, capacity=-(-info.frame_count // stride), timings=timings)
+    except BaseException:
+        ring.abort()                                                            # Декодер не должен ждать свободного слота
+        raise
+    finally:
+        frames.close()
+        ring.close()
+
+    track = PoseTrack(landmarks, info.fps / stride, info.width, info.height)
+    logger.info(
+        f"🦴 Поза найдена на {track.detected_frames}/{len(landmarks)} кадрах из общей памяти "
+        f"за {time.perf_counter() - started:.2f} с"
+    )
+    timings.pop('decode', None)                                                 # Здесь это ожидание кадров; decode вернет декодер
+    result = score_track(track, timings)
+    result['stage_seconds'] = timings
+    return result
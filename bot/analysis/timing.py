@@ -0,0 +1,8 @@
+from typing import Dict, Optional
+
+
+def add_timing(timings: Optional[Dict[str, float]], stage: str, seconds: float):
+    # Этапы задачи в воркере копятся в словаре и возвращаются вместе с результатом (stage_seconds);
+    # в гистограммы Prometheus их пишет уже процесс бота
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
@@ -0,0 +1,27 @@
+from typing import Dict, NamedTuple
+
+import numpy as np
+
+# Типы, которые воркеры возвращают в бот: без cv2/mediapipe, распаковка результата их не импортирует
+NUM_LANDMARKS = 33
+POSE_INPUT_SIZE = 256           # MediaPipe все равно работает на 256x256, большие кадры только тратят CPU
+
+
+class PoseTrack(NamedTuple):
+    landmarks: np.ndarray       # (кадры, 33, 4): x, y, z, visibility; NaN - поза не найдена
+    fps: float                  # Частота выбранных кадров
+    width: int
+    height: int
+
+    @property
+    def detected_frames(self) -> int:
+        return int(np.isfinite(self.landmarks[:, 0, 0]).sum())
+
+
+class SegmentTrack(NamedTuple):
+    first_sample: int           # Номер первого кадра отрезка в общей сетке выборки (кадр видео / шаг)
+    landmarks: np.ndarray       # (кадры, 33, 4)
+    fps: float
+    width: int
+    height: int
+    timings: Dict[str, float]   # Этапы задачи отрезка (decode, inference)
@@ -0,0 +1,118 @@
+"""Процесс-воркер анализа для режима ANALYSIS_MODE=broker.
+
+Берет задачи из брокера, выполняет пайплайн кадров/поз и записывает результат обратно;
+фронтенд бота забирает его и отвечает пользователю.
+
+    python analysis_worker.py --processes 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import traceback
+
+import config
+from broker import STATUS_CANCELLED, SQLiteBroker, resolve_target
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL = 0.25       # Как часто воркер отмечается и проверяет отмену
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def make_cancel_check(broker: SQLiteBroker, job_id: int):
+    # Обращаемся к брокеру не чаще HEARTBEAT_INTERVAL, а не на каждом кадре
+    next_check = [0.0]
+
+    def cancel_check():
+        now = time.monotonic()
+        if now < next_check[0]:
+            return
+        next_check[0] = now + HEARTBEAT_INTERVAL
+        if broker.heartbeat(job_id) == STATUS_CANCELLED:
+            raise JobCancelled()
+
+    return cancel_check
+
+
+def worker_loop(db_path: str, max_jobs: int = 0):
+    import analysis.pipeline  # noqa: F401  (импорт cv2/scipy до первой задачи, а не во время нее)
+    from analysis.pose import init_pose_worker
+
+    started = time.perf_counter()
+    init_pose_worker()                                                          # Модель грузится один раз на процесс
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info(f"👷 Воркер {worker_id} готов за {time.perf_counter() - started:.2f} с")
+
+    broker = SQLiteBroker(db_path)
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+
+    processed = 0
+    idle_sleep = config.BROKER_POLL_INTERVAL
+    while not stopping and (not max_jobs or processed < max_jobs):
+        broker.requeue_stale(config.BROKER_STALE_SECONDS, config.BROKER_MAX_ATTEMPTS)
+        job = broker.claim(worker_id)
+        if job is None:
+            time.sleep(idle_sleep)
+            idle_sleep = min(1.0, idle_sleep * 2)
+            continue
+        idle_sleep = config.BROKER_POLL_INTERVAL
+
+        job_started = time.perf_counter()
+        try:
+            fn = resolve_target(job.target)
+            result = fn(*job.args, **job.kwargs, cancel_check=make_cancel_check(broker, job.id))
+            broker.complete(job.id, result)
+            logger.info(f"✅ Задача {job.id} выполнена за {time.perf_counter() - job_started:.2f} с")
+        except JobCancelled:
+            logger.info(f"🛑 Задача {job.id} отменена")
+        except Exception as e:
+            logger.error(f"❌ Задача {job.id} завершилась ошибкой: {e}\n{traceback.format_exc()}")
+            broker.fail(job.id, repr(e))
+        processed += 1
+
+    broker.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', default=config.BROKER_DB)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--max-jobs', type=int, default=0, help='перезапуск процесса после N задач (0 - без лимита)')
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+
+    processes = {}
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    signal.signal(signal.SIGINT, lambda *_: stopping.append(True))
+
+    while not stopping:
+        for slot in range(args.processes):                                      # Поднимаем упавшие и отработавшие процессы
+            process = processes.get(slot)
+            if process is None or not process.is_alive():
+                process = multiprocessing.Process(target=worker_loop, args=(args.db, args.max_jobs), daemon=True)
+                process.start()
+                processes[slot] = process
+        time.sleep(0.5)
+
+    for process in processes.values():
+        process.terminate()
+    for process in processes.values():
+        process.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""Пакетный анализ архива видео без Telegram: каталог или манифест -> JSONL с результатами.
+
+Тот же пайплайн, что у бота (analysis.pipeline.analyze_video), в пуле процессов на все ядра;
+модель позы грузится один раз на воркер. Готовое видео дописывается в JSONL и отмечается в файле
+контрольной точки - повторный запуск пропускает уже посчитанные (измененный файл считается заново).
+
+    python batch_analyze.py /data/sessions --output results.jsonl
+    python batch_analyze.py --manifest videos.txt --output results.jsonl --workers 8
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+import config
+from parallel_analysis import ANALYZE_VIDEO
+from worker_pool import AnalysisWorkerPool
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm', '.m4v')
+PROGRESS_INTERVAL = 30.0        # Как часто писать прогресс и текущую скорость
+
+
+class VideoFile(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+
+
+def scan_directory(directory: str) -> List[str]:
+    paths = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(names) if name.lower().endswith(VIDEO_EXTENSIONS))
+    return paths
+
+
+def read_manifest(manifest_path: str) -> List[str]:
+    # Путь на строку или JSONL с полем "path"; относительные пути - от папки манифеста
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    paths = []
+    with open(manifest_path, encoding='utf-8') as manifest:
+        for line in manifest:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path = json.loads(line)['path'] if line.startswith('{') else line
+            paths.append(os.path.join(base, path))
+    return paths
+
+
+def stat_videos(paths: List[str]) -> List[VideoFile]:
+    videos = []
+    for path in dict.fromkeys(os.path.abspath(path) for path in paths):       # Без повторов, порядок сохраняется
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Пропускаю {path}: {e}")
+            continue
+        videos.append(VideoFile(path, stat.st_size, stat.st_mtime_ns))
+    return videos
+
+
+class Checkpoint:
+    # Строка JSON на посчитанное видео. Пишется после строки результата: при падении между ними
+    # видео посчитается еще раз и результат повторится, но не потеряется
+    def __init__(self, path: str):
+        self.path = path
+        self.done = set()
+        try:
+            with open(path, encoding='utf-8') as checkpoint:
+                for line in checkpoint:
+                    try:
+                        self.done.add(VideoFile(*json.loads(line)))
+                    except (ValueError, TypeError):                             # Недописанная строка при аварийной остановке
+                        continue
+        except FileNotFoundError:
+            pass
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def __contains__(self, video: VideoFile) -> bool:
+        return video in self.done
+
+    def add(self, video: VideoFile):
+        self._file.write(json.dumps(list(video), ensure_ascii=False) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.done.add(video)
+
+    def close(self):
+        self._file.close()
+
+
+class BatchProgress:
+    def __init__(self, total: int):
+        self.total = total
+        self.analysed = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.stage_seconds: Dict[str, float] = {}
+
+    @property
+    def videos_per_hour(self) -> float:
+        return self.analysed / max(time.perf_counter() - self.started, 1e-9) * 3600
+
+    def log(self):
+        done = self.analysed + self.failed
+        rate = self.videos_per_hour
+        eta = (self.total - done) / rate * 3600 if rate else 0.0
+        logger.info(f"📊 {done}/{self.total} видео, ошибок {self.failed}, {rate:.0f} видео/ч, осталось ~{eta / 60:.0f} мин")
+
+
+async def run_batch(videos: List[VideoFile], output_path: str, checkpoint_path: str,
+                    workers: int, adaptive: bool = config.ADAPTIVE_ANALYSIS) -> Dict:
+    checkpoint = Checkpoint(checkpoint_path)
+    pending = [video for video in videos if video not in checkpoint]
+    logger.info(f"🗂️ Видео: {len(videos)}, уже посчитано: {len(videos) - len(pending)}, в работе: {len(pending)}")
+
+    pool = AnalysisWorkerPool(max_workers=workers)
+    output = open(output_path, 'a', encoding='utf-8')
+    semaphore = asyncio.Semaphore(workers * 2)                                  # Очередь пула не пустеет, пока цикл пишет результат
+    progress = None
+    reporter: Optional[asyncio.Task] = None
+
+    def write(record: Dict):
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        output.flush()
+
+    async def analyse(video: VideoFile):
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                result = await pool.run(ANALYZE_VIDEO, video.path, adaptive=adaptive)
+            except Exception as e:                                              # В контрольную точку не попадает - следующий запуск повторит
+                logger.error(f"❌ {video.path}: {e}")
+                progress.failed += 1
+                write({'path': video.path, 'error': repr(e)})
+                return
+        for stage, seconds in result.pop('stage_seconds', {}).items():
+            progress.stage_seconds[stage] = progress.stage_seconds.get(stage, 0.0) + seconds
+        write({'path': video.path, 'size': video.size, **result, 'seconds': round(time.perf_counter() - started, 3)})
+        checkpoint.add(video)
+        progress.analysed += 1
+
+    async def report():
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            progress.log()
+
+    try:
+        await pool.start()                                                      # Прогрев моделей в скорость не входит
+        progress = BatchProgress(len(pending))
+        reporter = asyncio.create_task(report())
+        await asyncio.gather(*(analyse(video) for video in pending))
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        pool.shutdown()
+        output.close()
+        checkpoint.close()
+
+    seconds = time.perf_counter() - progress.started
+    return {
+        'videos': len(videos),
+        'skipped': len(videos) - len(pending),
+        'analysed': progress.analysed,
+        'failed': progress.failed,
+        'workers': workers,
+        'seconds': round(seconds, 1),
+        'videos_per_hour': round(progress.videos_per_hour, 1),
+        'stage_seconds': {stage: round(value, 1) for stage, value in progress.stage_seconds.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('directory', nargs='?', help='папка с видео (обходится рекурсивно)')
+    parser.add_argument('--manifest', help='файл со списком видео: путь на строку или JSONL с полем "path"')
+    parser.add_argument('--output', default='results.jsonl')
+    parser.add_argument('--checkpoint', help='по умолчанию - <output>.checkpoint')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='процессов анализа (по умолчанию - все ядра)')
+    parser.add_argument('--adaptive', action='store_true', default=config.ADAPTIVE_ANALYSIS,
+                        help='адаптивный анализ: быстрее, длинное видео с ровными повторениями смотрится не до конца')
+    parser.add_argument('--verbose', action='store_true', help='логи пайплайна по каждому видео')
+    args = parser.parse_args()
+    if not args.directory and not args.manifest:
+        parser.error('укажите папку или --manifest')
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    if not args.verbose:                                                        # Воркеры наследуют настройки при старте пула
+        for name in ('analysis', 'OpenCV', 'worker_pool'):
+            logging.getLogger(name).setLevel(logging.WARNING)
+    config.PROGRESS_BARS = False
+
+    paths = read_manifest(args.manifest) if args.manifest else scan_directory(args.directory)
+    videos = stat_videos(paths)
+    summary = asyncio.run(run_batch(videos, args.output, args.checkpoint or f"{args.output}.checkpoint",
+                                    args.workers, args.adaptive))
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
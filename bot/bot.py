@@ -2,12 +2,25 @@ from Token import BOT_TOKEN
 from aiogram import Bot, Dispatcher
 import asyncio
 import logging
+import sys
+import time
 
 
 from handlers.callback_handlers import callback_router
 from handlers.text_handlers import text_router
 from handlers.user_commands import user_commands_router
 from handlers.video_handlers import video_router
+import config
+from maintenance import maintenance
+from metrics import start_metrics_server, watch
+from recovery import reconcile_jobs
+from scheduler import scheduler
+from task_manager import task_manager
+from utils.fsm_storage import SQLiteStorage, create_fsm_storage
+from utils.rate_limit import rate_limiter
+from utils.result_cache import result_cache
+from utils.results_store import results_store
+from webhook import run_webhook
 
 logging.basicConfig(
     level=logging.INFO, 
@@ -18,16 +31,47 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 bot = Bot(token=BOT_TOKEN)
-dp = Dispatcher()
+dp = Dispatcher(storage=create_fsm_storage())
 
 dp.include_router(user_commands_router)
 dp.include_router(text_router)
 dp.include_router(callback_router)
 dp.include_router(video_router) 
 
+def log_startup_report():
+    # С момента запуска процесса: импорты, прогрев пула, восстановление задач. Разбор импортов - benchmarks/bench_startup.py
+    import psutil
+
+    process = psutil.Process()
+    seconds = time.time() - process.create_time()
+    rss_mb = process.memory_info().rss / (1024 * 1024)
+    heavy = [name for name in ('cv2', 'mediapipe', 'scipy', 'numpy', 'tqdm') if name in sys.modules]
+    logger.info(f"🚀 Запуск за {seconds:.2f} с, RSS бота {rss_mb:.0f} МБ")
+    if heavy:
+        logger.warning(f"⚠️ В процессе бота загружены {', '.join(heavy)} - им место только в воркерах анализа")
+
 async def main():
+    await scheduler.pool.start()
+    watch(scheduler, task_manager, rate_limiter)
+    metrics_runner = await start_metrics_server()
+    if isinstance(dp.storage, SQLiteStorage):
+        await reconcile_jobs(bot, dp.storage)
+    maintenance.start()
+    log_startup_report()
     print("Бот запущен!")
-    await dp.start_polling(bot)
+    try:
+        if config.BOT_MODE == 'webhook':
+            await run_webhook(dp, bot)
+        else:
+            await dp.start_polling(bot)
+    finally:
+        await maintenance.stop()
+        await result_cache.flush()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        scheduler.pool.shutdown()
+        await results_store.close()
+        await dp.storage.close()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
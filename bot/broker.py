@@ -0,0 +1,328 @@
+import asyncio
+import functools
+import importlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STATUS_QUEUED = 'queued'
+STATUS_RUNNING = 'running'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+FINAL_STATUSES = (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)
+PURGE_BATCH = 1000              # Удаляем порциями, чтобы не держать блокировку записи долго
+
+
+class RemoteJobError(Exception):
+    pass
+
+
+class Job(NamedTuple):
+    id: int
+    target: str                 # "модуль:функция", воркер импортирует ее сам
+    args: list
+    kwargs: dict
+    status: str
+    result: Any
+    error: Optional[str]
+    attempts: int
+
+
+def job_target(fn: Union[str, Callable]) -> str:
+    if isinstance(fn, str):
+        return fn
+    return f"{fn.__module__}:{fn.__qualname__}"
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_target(target: str) -> Callable:
+    # Модуль импортируется при первом обращении - в процессе воркера, а не в боте
+    module_name, function_name = target.split(':')
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+class JobBroker(ABC):
+    # Интерфейс очереди между фронтендом бота и процессами-воркерами
+    @abstractmethod
+    def enqueue(self, target: str, args: list, kwargs: dict) -> int:
+        ...
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def heartbeat(self, job_id: int) -> str:
+        ...
+
+    @abstractmethod
+    def complete(self, job_id: int, result: Any):
+        ...
+
+    @abstractmethod
+    def fail(self, job_id: int, error: str):
+        ...
+
+    @abstractmethod
+    def cancel(self, job_id: int):
+        ...
+
+    @abstractmethod
+    def cancel_pending(self) -> int:
+        ...
+
+    @abstractmethod
+    def purge_finished(self, max_age: float) -> int:
+        ...
+
+    @abstractmethod
+    def finished(self, job_ids: List[int]) -> List[Job]:
+        ...
+
+    @abstractmethod
+    def get(self, job_id: int) -> Optional[Job]:
+        ...
+
+    @abstractmethod
+    def requeue_stale(self, stale_seconds: float, max_attempts: int) -> int:
+        ...
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        ...
+
+
+class SQLiteBroker(JobBroker):
+    # Локальная реализация без внешних сервисов: один файл SQLite в WAL, у каждого процесса свое соединение.
+    # owner - фронтенд, поставивший задачу: при его перезапуске отменяются только его задачи
+    def __init__(self, path: str = config.BROKER_DB, owner: str = config.BROKER_OWNER):
+        self.path = path
+        self.owner = owner or socket.gethostname()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " target TEXT NOT NULL, args TEXT NOT NULL, kwargs TEXT NOT NULL,"
+            " status TEXT NOT NULL, result TEXT, error TEXT, worker TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL, owner TEXT)"
+        )
+        columns = {row[1] for row in self._connection.execute("PRAGMA table_info(jobs)")}
+        if 'owner' not in columns:                                              # База от версии без владельцев
+            self._connection.execute("ALTER TABLE jobs ADD COLUMN owner TEXT")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished_at)")
+
+    @staticmethod
+    def _job(row) -> Job:
+        job_id, target, args, kwargs, status, result, error, attempts = row
+        return Job(job_id, target, json.loads(args), json.loads(kwargs), status,
+                   json.loads(result) if result is not None else None, error, attempts)
+
+    _COLUMNS = "id, target, args, kwargs, status, result, error, attempts"
+
+    def enqueue(self, target, args, kwargs):
+        cursor = self._connection.execute(
+            "INSERT INTO jobs (target, args, kwargs, status, created_at, owner) VALUES (?, ?, ?, ?, ?, ?)",
+            (target, json.dumps(args), json.dumps(kwargs), STATUS_QUEUED, time.time(), self.owner),
+        )
+        return cursor.lastrowid
+
+    def claim(self, worker_id):
+        # BEGIN IMMEDIATE: два воркера не возьмут одну задачу
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                f"SELECT {self._COLUMNS} FROM jobs WHERE status = ? ORDER BY id LIMIT 1", (STATUS_QUEUED,)
+            ).fetchone()
+            if row is not None:
+                now = time.time()
+                connection.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1,"
+                    " started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (STATUS_RUNNING, worker_id, now, now, row[0]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return self._job(row) if row is not None else None
+
+    def heartbeat(self, job_id):
+        self._connection.execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = ?", (time.time(), job_id, STATUS_RUNNING)
+        )
+        row = self._connection.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row[0] if row else STATUS_CANCELLED
+
+    def _finish(self, job_id, status, result=None, error=None):
+        self._connection.execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND status = ?",
+            (status, json.dumps(result) if result is not None else None, error, time.time(), job_id, STATUS_RUNNING),
+        )
+
+    def complete(self, job_id, result):
+        self._finish(job_id, STATUS_DONE, result=result)
+
+    def fail(self, job_id, error):
+        self._finish(job_id, STATUS_FAILED, error=error)
+
+    def cancel(self, job_id):
+        self._connection.execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status IN (?, ?)",
+            (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED, STATUS_RUNNING),
+        )
+
+    def cancel_pending(self):
+        # Только задачи этого фронтенда (и старые без владельца) - очередь может быть общей для нескольких ботов
+        cursor = self._connection.execute(
+            "UPDATE jobs SET status = ?, finished_at = ? WHERE status IN (?, ?) AND (owner = ? OR owner IS NULL)",
+            (STATUS_CANCELLED, time.time(), STATUS_QUEUED, STATUS_RUNNING, self.owner),
+        )
+        return cursor.rowcount
+
+    def purge_finished(self, max_age):
+        # Результат забирает опрос BrokerPool сразу после завершения - старые строки уже никому не нужны
+        deadline = time.time() - max_age
+        removed = 0
+        while True:
+            cursor = self._connection.execute(
+                "DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE finished_at < ? AND status IN (?, ?, ?) LIMIT ?)",
+                (deadline, *FINAL_STATUSES, PURGE_BATCH),
+            )
+            removed += cursor.rowcount
+            if cursor.rowcount < PURGE_BATCH:
+                return removed
+
+    def finished(self, job_ids):
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" * len(job_ids))
+        rows = self._connection.execute(
+            f"SELECT {self._COLUMNS} FROM jobs WHERE id IN ({placeholders}) AND status IN (?, ?, ?)",
+            (*job_ids, *FINAL_STATUSES),
+        ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def get(self, job_id):
+        row = self._connection.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row is not None else None
+
+    def requeue_stale(self, stale_seconds, max_attempts):
+        # Воркер упал посреди задачи: возвращаем ее в очередь или окончательно проваливаем
+        deadline = time.time() - stale_seconds
+        self._connection.execute(
+            "UPDATE jobs SET status = ?, error = 'worker lost', finished_at = ?"
+            " WHERE status = ? AND heartbeat_at < ? AND attempts >= ?",
+            (STATUS_FAILED, time.time(), STATUS_RUNNING, deadline, max_attempts),
+        )
+        cursor = self._connection.execute(
+            "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ?",
+            (STATUS_QUEUED, STATUS_RUNNING, deadline),
+        )
+        return cursor.rowcount
+
+    def counts(self):
+        rows = self._connection.execute(
+            "SELECT status, COUNT(*) FROM jobs WHERE status IN (?, ?) GROUP BY status", (STATUS_QUEUED, STATUS_RUNNING)
+        ).fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._connection.close()
+
+
+class BrokerPool:
+    # Тот же интерфейс, что у AnalysisWorkerPool, но задачи уходят в брокер к отдельным процессам-воркерам
+    segmentable = False         # Аргументы и результаты идут через JSON, массивы поз не передать
+    shared_memory = False       # Воркеры могут быть на других машинах
+
+    def __init__(self, broker: Optional[JobBroker] = None, max_workers: int = config.BROKER_WORKERS,
+                 poll_interval: float = config.BROKER_POLL_INTERVAL):
+        self.broker = broker
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self._waiters: Dict[int, asyncio.Future] = {}
+        self._poller: Optional[asyncio.Task] = None
+        self.completed = 0
+        self.cancelled = 0
+
+    async def start(self):
+        if self.broker is None:
+            self.broker = SQLiteBroker()
+            # Задачи прошлого запуска этого фронтенда уже никто не ждет - освобождаем воркеры (чужие не трогаем).
+            # Прерванные анализы заново ставит в очередь recovery.reconcile_jobs
+            orphaned = await asyncio.to_thread(self.broker.cancel_pending)
+            if orphaned:
+                logger.info(f"🧹 Отменено {orphaned} задач прошлого запуска")
+        if self._poller is None:
+            self._poller = asyncio.create_task(self._poll())
+        logger.info(f"📮 Анализ через брокер {getattr(self.broker, 'path', '')}")
+
+    async def _poll(self):
+        # Один запрос на все ожидающие задачи вместо опроса каждой по отдельности
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self._waiters:
+                continue
+            try:
+                jobs = await asyncio.to_thread(self.broker.finished, list(self._waiters))
+            except sqlite3.Error as e:
+                logger.error(f"❌ Ошибка опроса брокера: {e}")
+                continue
+            for job in jobs:
+                waiter = self._waiters.pop(job.id, None)
+                if waiter is None or waiter.done():
+                    continue
+                if job.status == STATUS_DONE:
+                    waiter.set_result(job.result)
+                else:
+                    waiter.set_exception(RemoteJobError(job.error or job.status))
+
+    async def run(self, fn: Union[str, Callable], *args, **kwargs) -> Any:
+        if self._poller is None:
+            await self.start()
+        job_id = await asyncio.to_thread(self.broker.enqueue, job_target(fn), list(args), kwargs)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters[job_id] = waiter
+        try:
+            result = await waiter
+            self.completed += 1
+            return result
+        except asyncio.CancelledError:
+            self._waiters.pop(job_id, None)
+            await asyncio.to_thread(self.broker.cancel, job_id)                 # Воркер увидит статус при heartbeat
+            self.cancelled += 1
+            raise
+
+    def metrics(self) -> Dict[str, Any]:
+        counts = self.broker.counts() if self.broker is not None else {}
+        return {
+            'workers': self.max_workers,
+            'busy_workers': counts.get(STATUS_RUNNING, 0),
+            'queue_depth': counts.get(STATUS_QUEUED, 0),
+            'completed': self.completed,
+            'cancelled': self.cancelled,
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        for job_id in list(self._waiters):
+            self.broker.cancel(job_id)
+        self._waiters.clear()
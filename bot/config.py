@@ -0,0 +1,100 @@
+import os
+
+# Пул процессов анализа видео
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '0'))                  # 0 - по числу ядер
+WORKER_MAX_TASKS = int(os.getenv('WORKER_MAX_TASKS', '50'))                 # Перезапуск воркеров после N задач на каждый
+WORKER_MAX_RSS_MB = int(os.getenv('WORKER_MAX_RSS_MB', '1500'))             # ... или при превышении памяти
+
+# Наблюдаемость: Prometheus-метрики на локальном порту и прогресс-бары tqdm в воркерах
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '9100'))                       # 0 - выключено
+PROGRESS_BARS = os.getenv('PROGRESS_BARS', '1') == '1'                      # В продакшене - 0: tqdm пишет в stderr на каждом кадре
+
+# Получение обновлений: polling или webhook (aiohttp-сервер)
+BOT_MODE = os.getenv('BOT_MODE', 'polling')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')                                  # Публичный адрес, например https://bot.example.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')                            # Проверяется в X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', '8080'))
+WEBHOOK_MAX_CONNECTIONS = int(os.getenv('WEBHOOK_MAX_CONNECTIONS', '40'))   # Параллельных соединений со стороны Telegram
+WEBHOOK_MAX_HANDLERS = int(os.getenv('WEBHOOK_MAX_HANDLERS', '100'))        # Одновременно выполняемых обработчиков
+WEBHOOK_MAX_BACKLOG = int(os.getenv('WEBHOOK_MAX_BACKLOG', '1000'))         # Сверх этого отвечаем 503, Telegram повторит позже
+WEBHOOK_KEEPALIVE = float(os.getenv('WEBHOOK_KEEPALIVE', '75'))
+WEBHOOK_DRAIN_SECONDS = float(os.getenv('WEBHOOK_DRAIN_SECONDS', '30'))     # Ожидание обработчиков при остановке
+WEBHOOK_RECORD_PATH = os.getenv('WEBHOOK_RECORD_PATH', '')                  # JSONL с входящими обновлениями для replay
+
+# Хранилище FSM-состояний: memory или sqlite (переживает перезапуск)
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory')
+FSM_DB = os.getenv('FSM_DB', 'data/fsm.db')
+FSM_FLUSH_INTERVAL = float(os.getenv('FSM_FLUSH_INTERVAL', '0.2'))         # Запись на диск отложена не дольше чем на N секунд
+
+# Режим анализа: local - пул процессов внутри бота, broker - очередь для отдельных analysis_worker.py
+ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'local')
+BROKER_DB = os.getenv('BROKER_DB', 'data/jobs.db')                          # Общий файл очереди для бота и воркеров
+BROKER_WORKERS = int(os.getenv('BROKER_WORKERS', '2'))                      # Сколько задач отдавать в брокер одновременно
+BROKER_POLL_INTERVAL = float(os.getenv('BROKER_POLL_INTERVAL', '0.2'))
+BROKER_STALE_SECONDS = float(os.getenv('BROKER_STALE_SECONDS', '30'))       # Задача без heartbeat считается брошенной
+BROKER_MAX_ATTEMPTS = int(os.getenv('BROKER_MAX_ATTEMPTS', '2'))
+BROKER_OWNER = os.getenv('BROKER_OWNER', '')                                # Имя фронтенда в общей очереди (пусто - имя хоста); у ботов на одной машине - разное
+BROKER_RETENTION_SECONDS = float(os.getenv('BROKER_RETENTION_SECONDS', str(24 * 3600)))  # Завершенные задачи удаляются из очереди через столько
+
+# Адаптивный анализ: уменьшение кадра сразу после декодера, пропуск неподвижных участков,
+# ранняя остановка на стабильных повторениях (в результате - повторения просмотренной части и early_exit)
+ADAPTIVE_ANALYSIS = os.getenv('ADAPTIVE_ANALYSIS', '0') == '1'
+
+# Длинное видео делится на отрезки по времени и анализируется параллельно, если в пуле есть свободные воркеры
+# (кроме ADAPTIVE_ANALYSIS=1 - адаптивный анализ идет по видео целиком)
+SEGMENT_ANALYSIS = os.getenv('SEGMENT_ANALYSIS', '1') == '1'
+SEGMENT_MIN_SECONDS = float(os.getenv('SEGMENT_MIN_SECONDS', '30'))         # Отрезки не короче этого
+SEGMENT_OVERLAP_SECONDS = float(os.getenv('SEGMENT_OVERLAP_SECONDS', '3')) # Перекрытие на стыке
+SEGMENT_MAX = int(os.getenv('SEGMENT_MAX', '4'))
+
+# Передача кадров: inline - декодирование и поза в одном процессе; shm - декодер и анализ в двух воркерах,
+# кадры идут через кольцо слотов в общей памяти (только если второй воркер простаивает)
+FRAME_TRANSPORT = os.getenv('FRAME_TRANSPORT', 'inline')
+FRAME_RING_SLOTS = int(os.getenv('FRAME_RING_SLOTS', '16'))                 # Сколько кадров декодер может опережать анализ
+
+# Очередь задач анализа
+MAX_QUEUED_JOBS = int(os.getenv('MAX_QUEUED_JOBS', '20'))                   # Принятых видео одновременно (в очереди + в работе)
+INITIAL_JOB_SECONDS = float(os.getenv('INITIAL_JOB_SECONDS', '20'))         # Оценка длительности до первых замеров
+
+# Кэш результатов анализа
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', '1000'))
+RESULT_CACHE_TTL = float(os.getenv('RESULT_CACHE_TTL', str(7 * 24 * 3600)))
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH', '')                      # Пусто - только в памяти
+
+# История результатов
+RESULTS_DB = os.getenv('RESULTS_DB', 'data/results.db')
+RESULTS_FLUSH_INTERVAL = float(os.getenv('RESULTS_FLUSH_INTERVAL', '1'))   # Результаты пишутся пачками раз в N секунд
+RESULTS_BATCH_SIZE = int(os.getenv('RESULTS_BATCH_SIZE', '100'))            # ... или сразу при накоплении пачки
+RESULTS_PAGE_SIZE = int(os.getenv('RESULTS_PAGE_SIZE', '5'))
+
+# Загрузка видео
+UPLOAD_DIR = os.getenv('UPLOAD_DIR', '')                                    # Пусто - tmpfs (/dev/shm), если доступен
+UPLOAD_QUOTA_MB = int(os.getenv('UPLOAD_QUOTA_MB', '512'))
+DOWNLOAD_CHUNK_SIZE = int(os.getenv('DOWNLOAD_CHUNK_SIZE', str(256 * 1024)))
+
+# Фоновое обслуживание: сторож зависших задач, очистка загрузок, отладочных кадров и кэша
+MAINTENANCE_INTERVAL = float(os.getenv('MAINTENANCE_INTERVAL', '60'))       # Как часто запускаются задачи обслуживания
+TASK_TIMEOUT_SECONDS = float(os.getenv('TASK_TIMEOUT_SECONDS', '900'))      # Анализ дольше этого снимается (с ожиданием в очереди)
+UPLOAD_MAX_AGE_SECONDS = float(os.getenv('UPLOAD_MAX_AGE_SECONDS', '3600')) # Брошенные файлы загрузок старше этого удаляются
+UPLOAD_EVICT_MB = int(os.getenv('UPLOAD_EVICT_MB', '256'))                  # ... и самые старые из них, пока папка больше этого
+FRAMES_DIR = os.getenv('FRAMES_DIR', 'frames')                              # Отладочные JPEG-кадры, своя подпапка на задачу
+FRAMES_MAX_AGE_SECONDS = float(os.getenv('FRAMES_MAX_AGE_SECONDS', str(24 * 3600)))
+
+
+def _parse_rate_limits(value: str):
+    # "analysis=3/60,other=10/60" -> {'analysis': (3, 60.0), ...}
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        action, rule = item.split('=')
+        max_requests, time_window = rule.split('/')
+        limits[action.strip()] = (int(max_requests), float(time_window))
+    return limits
+
+
+# Лимиты запросов
+RATE_LIMITS = _parse_rate_limits(os.getenv('RATE_LIMITS', 'analysis=3/60'))
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv('RATE_LIMIT_SWEEP_INTERVAL', '300'))   # Очистка неактивных - задачей обслуживания, не чаще MAINTENANCE_INTERVAL
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', '')                              # Путь к SQLite - общий лимит для нескольких инстансов
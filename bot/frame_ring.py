@@ -0,0 +1,186 @@
+import itertools
+import logging
+import os
+import sys
+import time
+import numpy as np
+from multiprocessing import resource_tracker, shared_memory
+from typing import Callable, NamedTuple, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+RING_PREFIX = 'fitness_bot_ring'
+STALL_SECONDS = 30.0            # Вторая сторона не двигается дольше этого - считаем, что процесс умер
+POLL_MIN_SECONDS = 0.0002       # Ожидание слота: короткий сон с ростом до POLL_MAX_SECONDS
+POLL_MAX_SECONDS = 0.005
+
+# Заголовок - int64: счетчики только растут, пишет каждый свой (один писатель, один читатель)
+_WRITTEN, _READ, _STATE = range(3)
+_HEADER_FIELDS = 8
+_OPEN, _EOF, _ABORTED = range(3)
+
+_ring_ids = itertools.count()
+
+
+class RingAborted(Exception):
+    pass
+
+
+class RingStalled(Exception):
+    pass
+
+
+class RingSpec(NamedTuple):
+    # Все, что нужно другому процессу для подключения; передается в задачу пула вместо кадров
+    name: str
+    slots: int
+    slot_shape: Tuple[int, int, int]
+
+
+class FrameRing:
+    # Кольцо заранее выделенных слотов под кадры в multiprocessing.shared_memory.
+    # Декодер пишет кадр в свободный слот, анализ читает его как NumPy-view без копирования.
+    def __init__(self, shm: shared_memory.SharedMemory, spec: RingSpec, owner: bool):
+        self.shm = shm
+        self.spec = spec
+        self.owner = owner
+        slot_bytes = int(np.prod(spec.slot_shape))
+        meta_offset = _HEADER_FIELDS * 8
+        frames_offset = meta_offset + spec.slots * 3 * 8
+        self._header = np.ndarray((_HEADER_FIELDS,), dtype=np.int64, buffer=shm.buf)
+        self._meta = np.ndarray((spec.slots, 3), dtype=np.int64, buffer=shm.buf, offset=meta_offset)
+        self._frames = np.ndarray((spec.slots, slot_bytes), dtype=np.uint8, buffer=shm.buf, offset=frames_offset)
+
+    @staticmethod
+    def size_for(slots: int, slot_shape: Tuple[int, int, int]) -> int:
+        return (_HEADER_FIELDS + slots * 3) * 8 + slots * int(np.prod(slot_shape))
+
+    @classmethod
+    def create(cls, slots: int, slot_shape: Tuple[int, int, int]) -> 'FrameRing':
+        # Имя содержит pid владельца: после падения бота сегмент найдет sweep_stale_rings
+        name = f"{RING_PREFIX}_{os.getpid()}_{next(_ring_ids)}"
+        shm = shared_memory.SharedMemory(name=name, create=True, size=cls.size_for(slots, slot_shape))
+        ring = cls(shm, RingSpec(name, slots, tuple(slot_shape)), owner=True)
+        ring._header[:] = 0
+        return ring
+
+    @classmethod
+    def attach(cls, spec: RingSpec) -> 'FrameRing':
+        return cls(_attach_untracked(spec.name), spec, owner=False)
+
+    def _wait(self, ready: Callable[[], bool], peer: int, cancel_check: Optional[Callable[[], None]]):
+        # Back-pressure: ждем, пока вторая сторона сдвинет свой счетчик
+        delay = POLL_MIN_SECONDS
+        last_seen = int(self._header[peer])
+        last_progress = time.monotonic()
+        while not ready():
+            if self._header[_STATE] == _ABORTED:
+                raise RingAborted(f"Кольцо кадров {self.spec.name} закрыто")
+            if cancel_check is not None:
+                cancel_check()
+            seen = int(self._header[peer])
+            now = time.monotonic()
+            if seen != last_seen:
+                last_seen, last_progress = seen, now
+            elif now - last_progress > STALL_SECONDS:
+                raise RingStalled(f"Кольцо кадров {self.spec.name}: нет прогресса {STALL_SECONDS:.0f} с")
+            time.sleep(delay)
+            delay = min(delay * 2, POLL_MAX_SECONDS)
+
+    def put(self, frame_index: int, frame: np.ndarray, cancel_check: Optional[Callable[[], None]] = None):
+        # Сторона декодера: ждет свободный слот, копирует кадр и только потом публикует его
+        height, width = frame.shape[:2]
+        if frame.size > self._frames.shape[1]:
+            raise ValueError(f"Кадр {frame.shape} не помещается в слот {self.spec.slot_shape}")
+        written = int(self._header[_WRITTEN])
+        self._wait(lambda: written - self._header[_READ] < self.spec.slots, _READ, cancel_check)
+
+        slot = written % self.spec.slots
+        self._frames[slot, :frame.size].reshape(frame.shape)[...] = frame
+        self._meta[slot] = (frame_index, height, width)
+        self._header[_WRITTEN] = written + 1
+
+    def finish(self):
+        # Декодер дошел до конца видео
+        if self._header[_STATE] == _OPEN:
+            self._header[_STATE] = _EOF
+
+    def abort(self):
+        # Любая сторона (или владелец после ошибки/отмены): ожидающие получат RingAborted
+        self._header[_STATE] = _ABORTED
+
+    def get(self, cancel_check: Optional[Callable[[], None]] = None) -> Optional[Tuple[int, np.ndarray]]:
+        # Сторона анализа: (индекс кадра, view на слот) или None в конце видео.
+        # View действителен до release(): потом декодер перезапишет слот
+        read = int(self._header[_READ])
+        self._wait(lambda: self._header[_WRITTEN] > read or self._header[_STATE] == _EOF, _WRITTEN, cancel_check)
+        if self._header[_WRITTEN] == read:                                      # EOF и все прочитано
+            return None
+
+        slot = read % self.spec.slots
+        frame_index, height, width = (int(value) for value in self._meta[slot])
+        channels = self.spec.slot_shape[2]
+        return frame_index, self._frames[slot, :height * width * channels].reshape(height, width, channels)
+
+    def release(self):
+        self._header[_READ] += 1
+
+    def close(self):
+        # View наружу держать нельзя: mmap не закрыть, пока на него есть ссылки
+        self._header = self._meta = self._frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            logger.debug(f"Кольцо кадров {self.spec.name}: остались ссылки на слоты, закроется сборщиком мусора")
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _attach_untracked(name: str) -> shared_memory.SharedMemory:
+    # Удаляет сегмент только владелец. До 3.13 подключение тоже регистрируется в resource_tracker:
+    # свой трекер воркера удалил бы сегмент при выходе процесса, общий с ботом - потерял бы запись владельца
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def sweep_stale_rings(directory: str = '/dev/shm') -> int:
+    # Сегменты, чей владелец упал и не успел их удалить (resource_tracker тоже мог не отработать)
+    removed = 0
+    try:
+        names = [name for name in os.listdir(directory) if name.startswith(RING_PREFIX + '_')]
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        try:
+            pid = int(name[len(RING_PREFIX) + 1:].split('_')[0])
+        except ValueError:
+            continue
+        if pid == os.getpid() or _pid_alive(pid):
+            continue
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except OSError as e:
+            logger.error(f"❌ Ошибка при удалении {name}: {e}")
+    if removed:
+        logger.info(f"🧹 Удалено брошенных колец кадров: {removed}")
+    return removed
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
@@ -1,5 +1,6 @@
 from aiogram import Router, types, F
 from keyboards.reply import get_main_reply_keyboard
+from handlers.results_view import build_results_message
 from aiogram.fsm.context import FSMContext
 from states.analysis_states import AnalysisStates
 from task_manager import task_manager
@@ -22,7 +23,7 @@ async def process_analyz(callback_query: types.CallbackQuery, state: FSMContext)
     if is_limited:
         await callback_query.message.answer(
             "❌ Слишком много запросов!\n"
-            f"Доступно запросов: {remaining}/3\n"
+            f"Доступно запросов: {remaining}/{rate_limiter.limit_for()}\n"
             f"Подождите {int(wait_time)} секунд перед отправкой следующего видео."
         )
         return
@@ -73,8 +74,13 @@ async def show_results(callback_query: types.CallbackQuery, state: FSMContext):
         return
     
     await state.clear()
-    await callback_query.message.answer(
-        "📈 Здесь будут отображаться твои предыдущие результаты анализа.\n"
-        "Функция находится в разработке и будет доступна в ближайшем обновлении!",
-        reply_markup=get_main_reply_keyboard()
-    )
\ No newline at end of file
+    text, page_keyboard = await build_results_message(callback_query.from_user.id)
+    await callback_query.message.answer(text, reply_markup=page_keyboard or get_main_reply_keyboard())
+
+
+@callback_router.callback_query(F.data.startswith("results_page:"))
+async def show_results_page(callback_query: types.CallbackQuery):
+    await callback_query.answer()
+    before = float(callback_query.data.split(":", 1)[1])
+    text, page_keyboard = await build_results_message(callback_query.from_user.id, before=before)
+    await callback_query.message.answer(text, reply_markup=page_keyboard)
\ No newline at end of file
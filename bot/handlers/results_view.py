@@ -0,0 +1,45 @@
+from datetime import datetime
+from typing import Optional, Tuple
+
+from aiogram.types import InlineKeyboardMarkup
+from keyboards.inline import get_results_page_keyboard
+import config
+from utils.results_store import results_store
+
+EXERCISE_NAMES = {
+    'knee': 'Приседания / выпады',
+    'hip': 'Наклоны / тяги',
+    'elbow': 'Отжимания / жимы',
+}
+
+
+async def build_results_message(user_id: int, before: Optional[float] = None) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    history = await results_store.history(user_id, limit=config.RESULTS_PAGE_SIZE + 1, before=before)
+    if not history and before is None:
+        return (
+            "📈 У тебя пока нет сохраненных результатов.\n"
+            "Отправь видео с упражнением, и здесь появится история анализа!"
+        ), None
+
+    lines = []
+    if before is None:                                                          # Сводка - только на первой странице
+        lines.append("🏆 Лучшие результаты:")
+        for summary in await results_store.summaries(user_id):
+            amplitude = f", средняя амплитуда {summary.avg_amplitude:.0f}°" if summary.avg_amplitude is not None else ""
+            lines.append(
+                f"• {EXERCISE_NAMES.get(summary.exercise, summary.exercise)}: "
+                f"лучшая техника {summary.best_score}%{amplitude} ({summary.count} видео)"
+            )
+        lines.append("")
+
+    page = history[:config.RESULTS_PAGE_SIZE]
+    lines.append("📈 Последние анализы:" if before is None else "📈 Ранее:")
+    for result in page:
+        lines.append(
+            f"• {datetime.fromtimestamp(result.created_at):%d.%m %H:%M} — "
+            f"{EXERCISE_NAMES.get(result.exercise, result.exercise)}: "
+            f"{result.reps} повт., техника {result.technique_score}%"
+        )
+
+    keyboard = get_results_page_keyboard(page[-1].created_at) if len(history) > len(page) else None
+    return "\n".join(lines), keyboard
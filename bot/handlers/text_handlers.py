@@ -2,6 +2,7 @@ from aiogram import Router, types, F
 from aiogram.filters import StateFilter
 from aiogram.fsm.context import FSMContext
 from keyboards.reply import get_main_reply_keyboard
+from handlers.results_view import build_results_message
 from states.analysis_states import AnalysisStates
 from task_manager import task_manager
 from utils.rate_limit import rate_limiter
@@ -22,7 +23,7 @@ async def process_analyz(message: types.Message, state: FSMContext):
     if is_limited:
         await message.answer(
             "❌ Слишком много запросов!\n"
-            f"Доступно запросов: {remaining}/3\n"
+            f"Доступно запросов: {remaining}/{rate_limiter.limit_for()}\n"
             f"Подождите {int(wait_time)} секунд"
         )
         return
@@ -70,11 +71,8 @@ async def show_results(message: types.Message, state: FSMContext):
         return
     
     await state.clear()
-    await message.answer(
-        "📈 Здесь будут отображаться твои предыдущие результаты анализа.\n"
-        "Функция находится в разработке и будет доступна в ближайшем обновлении!",
-        reply_markup=get_main_reply_keyboard()
-    )
+    text, page_keyboard = await build_results_message(message.from_user.id)
+    await message.answer(text, reply_markup=page_keyboard or get_main_reply_keyboard())
 
 @text_router.message(~StateFilter(AnalysisStates.waiting_for_video), ~StateFilter(AnalysisStates.processing_video))  
 async def handle_other_text(message: types.Message):
@@ -4,13 +4,18 @@ from states.analysis_states import AnalysisStates
 import logging
 import time
 import os
-from OpenCV import save_frames
 import asyncio
-import concurrent.futures
+import config
+import metrics
 from task_manager import task_manager
 from utils.rate_limit import rate_limiter
+from utils.downloads import QuotaExceeded, upload_store
+from utils.result_cache import content_key, file_key, result_cache
+from utils.results_store import results_store
+from scheduler import QueueFull, scheduler
+from parallel_analysis import ANALYZE_VIDEO, run_analysis
 
-video_processor_executor = concurrent.futures.ProcessPoolExecutor(max_workers=2)
+TIMEOUT_MESSAGE = "⌛ Анализ занял слишком много времени и был остановлен. Попробуйте отправить видео покороче."
 
 def get_file_extension(mime_type: str) -> str:
         dict_type = {
@@ -24,10 +29,45 @@ def get_file_extension(mime_type: str) -> str:
         return dict_type.get(mime_type, '.mp4')
 
 
+def is_download_complete(local_file_path: str, expected_size: int) -> bool:
+    # Файл готов, когда он на месте и совпадает по размеру с тем, что сообщил Telegram
+    if not os.path.isfile(local_file_path):
+        return False
+    return not expected_size or os.path.getsize(local_file_path) == expected_size
+
+
 logger = logging.getLogger(__name__)
 video_router = Router()
 
-os.makedirs("uploads/videos", exist_ok=True)
+def format_analysis_result(analysis_result) -> str:
+    if analysis_result is None:
+        return "❌ Ошибка при обработке видео"
+    if analysis_result.get('unreadable'):
+        return "❌ Не удалось открыть видео. Попробуйте отправить его в формате MP4."
+    if analysis_result['detected_frames'] == 0:
+        return (
+            "❌ Не удалось распознать человека на видео. "
+            "Снимите упражнение так, чтобы вы были видны целиком."
+        )
+    reps = f"{analysis_result['reps']}"
+    if analysis_result.get('early_exit'):                                               # Остальное видео не смотрели - повторений там не считаем
+        reps += f" (за первые {analysis_result['analysed_seconds']:.0f} с из {analysis_result['video_seconds']:.0f} с)"
+    return (
+        f"✅ Видео обработано!\n"
+        f"📊 Результаты:\n"
+        f"• Повторений: {reps}\n"
+        f"• Техника выполнения: {analysis_result['technique_score']}%\n"
+        f"• Амплитуда движения: {analysis_result['amplitude']}\n"
+        f"• Скорость выполнения: {analysis_result['speed']}\n"
+        f"• Рекомендации: {analysis_result['recommendation']}"
+    )
+
+
+async def send_analysis_result(message: types.Message, analysis_result):
+    with metrics.span('reply'):
+        await message.answer(format_analysis_result(analysis_result))
+
+
 
 @video_router.message(F.video, AnalysisStates.waiting_for_video)
 async def handle_exercise_video(message: types.Message, state: FSMContext):
@@ -45,7 +85,7 @@ async def handle_exercise_video(message: types.Message, state: FSMContext):
     if is_limited:
         await message.answer(
             "❌ Слишком много запросов!\n"
-            f"Доступно запросов: {remaining}/3\n"
+            f"Доступно запросов: {remaining}/{rate_limiter.limit_for()}\n"
             f"Подождите {int(wait_time)} секунд перед отправкой следующего видео."
         )
         return
@@ -72,77 +112,106 @@ async def handle_exercise_video(message: types.Message, state: FSMContext):
         )
 
 
-        timestamp = int(time.time())                                                    # Сохранение видео на компьютер
-        user_id = message.from_user.id
-        file_extension = get_file_extension(message.video.mime_type)
-        filename = f"video_{user_id}_{timestamp}{file_extension}"
-        local_file_path = f"uploads/videos/{filename}"     
-
-        await message.answer("💾 Сохраняю видео файл...")
-        file_info = await message.bot.get_file(message.video.file_id)
-        await message.bot.download_file(file_info.file_path, local_file_path)
-        logger.info(f"Файл успешно скачан: {local_file_path}")
+        cache_key = file_key(message.video.file_unique_id)                             # Это видео уже анализировали?
+        cached_result = result_cache.get(cache_key)
+        if cached_result is not None:
+            logger.info(f"📦 Результат из кэша для пользователя {user_id}")
+            await send_analysis_result(message, cached_result)
+            await state.clear()
+            return
 
-        await asyncio.sleep(5)
-        
+        try:                                                                            # Резервируем место в очереди до скачивания
+            ticket = scheduler.admit(user_id)
+        except QueueFull as e:
+            await message.answer(
+                "⏳ Сейчас на анализе слишком много видео.\n"
+                f"Попробуйте отправить видео через {int(e.retry_after)} секунд."
+            )
+            return
 
-        await state.set_state(AnalysisStates.processing_video)                          # Анализируем видео 
-        await message.answer("🎬 Видео получено! Начинаю анализ...")
+        download = None
+        try:
+            timestamp = int(time.time())                                                # Сохранение видео (tmpfs, если есть)
+            user_id = message.from_user.id
+            file_extension = get_file_extension(message.video.mime_type)
+            filename = f"video_{user_id}_{timestamp}{file_extension}"
 
-        async def process_video_task():                                                 # Создаем функции для асинхронной обработки видео
+            await message.answer("💾 Сохраняю видео файл...")
             try:
-                # Запускаем обработку в отдельном процессе
-                loop = asyncio.get_event_loop()
-                await loop.run_in_executor(
-                    video_processor_executor, 
-                    save_frames, 
-                    local_file_path
+                download = await upload_store.fetch(
+                    message.bot, message.video.file_id, filename, message.video.file_size
                 )
-                
-                # Если дошли сюда - обработка завершена успешно
-                return True
-            except Exception as e:
-                logger.error(f"Ошибка в задаче обработки: {e}")
-                return False
+            except QuotaExceeded as e:
+                logger.warning(f"⚠️ {e}")
+                await message.answer("⏳ Сервер сейчас перегружен. Попробуйте отправить видео чуть позже.")
+                return
+            local_file_path = download.path
+            if not is_download_complete(local_file_path, message.video.file_size):
+                logger.error(f"Файл скачан не полностью: {local_file_path}")
+                await message.answer("❌ Видео загрузилось не полностью. Попробуйте отправить его еще раз.")
+                return
+            logger.info(f"Файл успешно скачан за {download.seconds:.2f} с: {local_file_path}")
+            metrics.observe('download', download.seconds)
+
+            cached_result = result_cache.get(content_key(download.sha256))
+            if cached_result is not None:
+                result_cache.put(cached_result, cache_key)
+                await send_analysis_result(message, cached_result)
+                await state.clear()
+                return
+
+            await state.set_state(AnalysisStates.processing_video)                      # Анализируем видео 
+            await state.update_data(video_path=local_file_path)                         # Для возобновления после перезапуска
+            await message.answer("🎬 Видео получено! Начинаю анализ...")
+
+            scheduler.enqueue(ticket)
+            position = scheduler.position(ticket)
+            if position:
+                await message.answer(
+                    f"⏳ Вы #{position} в очереди, ~{int(scheduler.estimate_wait(position))} с"
+                )
+
+            async def process_video_task():                                             # Создаем функции для асинхронной обработки видео
+                try:
+                    # Запускаем обработку в отдельном процессе
+                    return await run_analysis(ticket, local_file_path, message.video.duration)
+                except Exception as e:
+                    logger.error(f"Ошибка в задаче обработки: {e}")
+                    return None
 
         
-        video_task = asyncio.create_task(process_video_task())                          # Создаем и регистрируем задачу
-        task_manager.register_task(user_id, video_task)
+            video_task = asyncio.create_task(process_video_task())                      # Создаем и регистрируем задачу
+            task_manager.register_task(user_id, video_task, timeout=config.TASK_TIMEOUT_SECONDS)
 
         
-        try:                                                                            # Ждем завершения задачи (с возможностью отмены)
-            success = await video_task
-            # Если задача завершилась (даже с ошибкой)
-
-            if success:
-                analysis_result = {
-                    'technique_score': 85,
-                    'amplitude': 'Хорошо',
-                    'speed': 'Нормальная', 
-                    'recommendation': 'Следите за положением спины'
-                }
+            try:                                                                        # Ждем завершения задачи (с возможностью отмены)
+                analysis_result = await video_task
+                # Если задача завершилась (даже с ошибкой)
+
+                if analysis_result is not None:
+                    metrics.observe_stages(analysis_result.pop('stage_seconds', None))  # В кэш и историю не попадает
+                    result_cache.put(analysis_result, cache_key, content_key(download.sha256))
+                    results_store.add(user_id, analysis_result)                         # В историю "Мои результаты"
+                await send_analysis_result(message, analysis_result)
                 
-                await message.answer(
-                    f"✅ Видео обработано!\n"
-                    f"📊 Результаты:\n"
-                    f"• Техника выполнения: {analysis_result['technique_score']}%\n"
-                    f"• Амплитуда движения: {analysis_result['amplitude']}\n"
-                    f"• Скорость выполнения: {analysis_result['speed']}\n" 
-                    f"• Рекомендации: {analysis_result['recommendation']}"
-                )
-            else:
-                await message.answer("❌ Ошибка при обработке видео")
-                
-        except asyncio.CancelledError:
-            # Сюда попадем, если задачу отменили через task_manager                 
-            await message.answer("Запрос на отмену обработки принят")
-            return
+            except asyncio.CancelledError:
+                # Сюда попадем, если задачу отменили через task_manager                 
+                if task_manager.pop_timed_out(user_id):                                 # ... или ее снял сторож maintenance
+                    await message.answer(TIMEOUT_MESSAGE)
+                    await state.clear()
+                    return
+                await message.answer("Запрос на отмену обработки принят")
+                return
             
-        finally:
-            # ВСЕГДА убираем задачу из менеджера при завершении
-            task_manager.remove_completed_task(user_id)
+            finally:
+                # ВСЕГДА убираем задачу из менеджера при завершении
+                task_manager.remove_completed_task(user_id)
 
-        await state.clear()
+            await state.clear()
+        finally:
+            scheduler.release(ticket)
+            if download is not None:
+                download.cleanup()
 
     except Exception as e:
         logger.error(f"Ошибка при обработке видео: {e}")
@@ -169,5 +238,4 @@ async def analys_video(message: types.Message):
 
 
 async def process_video_async(file_path: str):
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, save_frames, file_path)
+    return await scheduler.pool.run(ANALYZE_VIDEO, file_path)
@@ -6,4 +6,11 @@ def get_main_inline_keyboard():
         [InlineKeyboardButton(text="📚 Инструкция", callback_data="instruction"),
         InlineKeyboardButton(text="📊 Мои результаты", callback_data="my_results")]
     ])
-    return inline_keyboard
\ No newline at end of file
+    return inline_keyboard
+
+def get_results_page_keyboard(before: float):
+    # Курсор страницы - время последней показанной записи
+    inline_keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="⬇️ Ранее", callback_data=f"results_page:{before!r}")]
+    ])
+    return inline_keyboard
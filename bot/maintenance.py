@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import config
+import metrics
+from scheduler import scheduler
+from task_manager import task_manager
+from utils.downloads import upload_store
+from utils.rate_limit import rate_limiter
+from utils.result_cache import result_cache
+
+logger = logging.getLogger(__name__)
+
+MB = 1024 * 1024
+
+
+def _entry_size(path: str) -> int:
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+
+def remove_old_entries(directory: str, max_age: float, now: Optional[float] = None) -> Tuple[int, int]:
+    # Подпапки задач и отдельные файлы старше max_age по времени последней записи
+    now = now if now is not None else time.time()
+    removed = freed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0, 0
+    for entry in entries:
+        try:
+            if now - entry.stat().st_mtime < max_age:
+                continue
+            size = _entry_size(entry.path)
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path)
+            else:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.error(f"❌ Не удалось удалить {entry.path}: {e}")
+            continue
+        removed += 1
+        freed += size
+    return removed, freed
+
+
+async def reap_tasks():
+    removed, timed_out = task_manager.reap()
+    if removed or timed_out:
+        logger.info(f"🧹 Задачи: убрано завершенных {removed}, снято по таймауту {timed_out}")
+    metrics.reclaimed('tasks', removed)
+    metrics.reclaimed('timeouts', timed_out)
+
+
+async def evict_uploads():
+    # В цикле событий, а не в потоке: набор используемых файлов меняется только здесь же (tmpfs - это быстро)
+    removed, freed = upload_store.evict(config.UPLOAD_MAX_AGE_SECONDS, config.UPLOAD_EVICT_MB * MB)
+    if removed:
+        logger.info(f"🧹 Загрузки: удалено {removed} брошенных файлов, {freed / MB:.1f} МБ")
+    metrics.reclaimed('uploads', removed, freed)
+
+
+async def evict_frames():
+    removed, freed = await asyncio.to_thread(remove_old_entries, config.FRAMES_DIR, config.FRAMES_MAX_AGE_SECONDS)
+    if removed:
+        logger.info(f"🧹 Кадры: удалено {removed} папок задач, {freed / MB:.1f} МБ")
+    metrics.reclaimed('frames', removed, freed)
+
+
+async def purge_cache():
+    expired = result_cache.purge_expired()
+    if expired:
+        logger.info(f"🧹 Кэш результатов: удалено {expired} просроченных записей")
+    metrics.reclaimed('cache', expired)
+    await result_cache.flush()                                                  # Новые и удаленные записи - на диск одним файлом
+
+
+async def sweep_rate_limits():
+    # Раз в RATE_LIMIT_SWEEP_INTERVAL; логирует сам лимитер
+    removed = await rate_limiter.sweep_if_due()
+    metrics.reclaimed('rate_limits', removed)
+
+
+async def purge_broker_jobs():
+    broker = getattr(scheduler.pool, 'broker', None)
+    if broker is None:                                                          # Пул еще не стартовал
+        return
+    removed = await asyncio.to_thread(broker.purge_finished, config.BROKER_RETENTION_SECONDS)
+    if removed:
+        logger.info(f"🧹 Очередь брокера: удалено {removed} завершенных задач")
+    metrics.reclaimed('broker_jobs', removed)
+
+
+class MaintenanceService:
+    # Периодические задачи обслуживания в цикле событий бота; ошибка одной не мешает остальным
+    def __init__(self, interval: float = config.MAINTENANCE_INTERVAL):
+        self.interval = interval
+        self.jobs: Dict[str, Callable[[], Awaitable[None]]] = {}
+        self.runs = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def add_job(self, name: str, job: Callable[[], Awaitable[None]]):
+        self.jobs[name] = job
+
+    async def run_once(self):
+        for name, job in self.jobs.items():
+            try:
+                await job()
+            except Exception as e:
+                logger.error(f"❌ Ошибка обслуживания ({name}): {e}")
+        self.runs += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.run_once()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info(f"🧰 Обслуживание раз в {self.interval:.0f} с: {', '.join(self.jobs)}")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+
+maintenance = MaintenanceService()
+maintenance.add_job('tasks', reap_tasks)
+maintenance.add_job('uploads', evict_uploads)
+maintenance.add_job('frames', evict_frames)
+maintenance.add_job('cache', purge_cache)
+maintenance.add_job('rate_limits', sweep_rate_limits)
+if config.ANALYSIS_MODE == 'broker':
+    maintenance.add_job('broker', purge_broker_jobs)
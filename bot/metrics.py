@@ -0,0 +1,85 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+import config
+
+logger = logging.getLogger(__name__)
+
+STAGES = ('download', 'wait', 'decode', 'inference', 'scoring', 'reply')
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 40, 80, 160)
+
+STAGE_SECONDS = Histogram('fitness_bot_stage_seconds', 'Время этапа обработки видео', ['stage'],
+                          buckets=STAGE_BUCKETS)
+_stage_histograms = {stage: STAGE_SECONDS.labels(stage) for stage in STAGES}  # labels() на каждом замере - лишний поиск
+
+QUEUE_DEPTH = Gauge('fitness_bot_queue_depth', 'Видео ждут свободного воркера')
+RUNNING_JOBS = Gauge('fitness_bot_running_jobs', 'Видео анализируются сейчас (слоты планировщика)')
+ACTIVE_TASKS = Gauge('fitness_bot_active_tasks', 'Незавершенные задачи пользователей в TaskManager')
+POOL_UTILISATION = Gauge('fitness_bot_pool_utilisation', 'Доля занятых воркеров анализа (0-1)')
+RATE_LIMITER_SIZE = Gauge('fitness_bot_rate_limiter_entries', 'Записей в таблице лимитера запросов')
+
+RECLAIMED_ITEMS = Counter('fitness_bot_reclaimed_items', 'Убрано фоновым обслуживанием', ['kind'])
+RECLAIMED_BYTES = Counter('fitness_bot_reclaimed_bytes', 'Освобождено фоновым обслуживанием, байт', ['kind'])
+
+
+def observe(stage: str, seconds: float):
+    _stage_histograms[stage].observe(seconds)
+
+
+def observe_stages(stage_seconds: Optional[Dict[str, float]]):
+    # Этапы из воркера (decode, inference, scoring) приходят вместе с результатом анализа
+    for stage, seconds in (stage_seconds or {}).items():
+        histogram = _stage_histograms.get(stage)
+        if histogram is not None:
+            histogram.observe(seconds)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    # Замер пишется только при успешном завершении: отмены и ошибки не искажают распределение
+    started = time.perf_counter()
+    yield
+    _stage_histograms[stage].observe(time.perf_counter() - started)
+
+
+def reclaimed(kind: str, items: int, size: int = 0):
+    RECLAIMED_ITEMS.labels(kind).inc(items)
+    if size:
+        RECLAIMED_BYTES.labels(kind).inc(size)
+
+
+def _pool_utilisation(pool: Any) -> float:
+    pool_metrics = pool.metrics()
+    return pool_metrics['busy_workers'] / max(pool_metrics['workers'], 1)
+
+
+def watch(scheduler: Any, task_manager: Any, rate_limiter: Any):
+    # Gauge считаются в момент запроса /metrics - на горячем пути ничего не обновляется
+    QUEUE_DEPTH.set_function(lambda: scheduler.waiting)
+    RUNNING_JOBS.set_function(lambda: scheduler.running)
+    ACTIVE_TASKS.set_function(lambda: sum(not task.done() for task in task_manager.active_tasks.values()))
+    POOL_UTILISATION.set_function(lambda: _pool_utilisation(scheduler.pool))
+    RATE_LIMITER_SIZE.set_function(lambda: len(rate_limiter))
+
+
+async def _metrics_handler(request: web.Request) -> web.Response:
+    # Сбор идет в цикле событий: gauge читают состояние бота без блокировок и без гонок с потоками
+    return web.Response(body=generate_latest(), headers={'Content-Type': CONTENT_TYPE_LATEST})
+
+
+async def start_metrics_server(host: str = config.METRICS_HOST,
+                               port: int = config.METRICS_PORT) -> Optional[web.AppRunner]:
+    if not port:
+        return None
+    app = web.Application()
+    app.router.add_get('/metrics', _metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Метрики: http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import math
+from typing import Any, Dict, List, Tuple
+
+import config
+from scheduler import Ticket, scheduler
+from video_errors import VideoOpenError
+
+logger = logging.getLogger(__name__)
+
+# Задачи пула - строками: cv2, mediapipe и scipy импортируются только в процессах-воркерах
+ANALYZE_VIDEO = 'analysis.pipeline:analyze_video'
+EXTRACT_POSE_SEGMENT = 'analysis.segments:extract_pose_segment'
+SCORE_SEGMENTS = 'analysis.segments:score_segments'
+DECODE_TO_RING = 'analysis.shared_frames:decode_to_ring'
+ANALYZE_RING = 'analysis.shared_frames:analyze_ring'
+
+
+def plan_segments(duration: float, count: int, overlap: float) -> List[Tuple[float, float]]:
+    # Равные отрезки; каждый, кроме первого, начинается на overlap секунд раньше - трекер успевает
+    # захватить позу до своей части, а повторение на стыке целиком попадает в оба отрезка.
+    # Последний отрезок - до конца файла: duration от Telegram целая и обрезает хвост видео
+    bounds = [duration * i / count for i in range(count)] + [math.inf]
+    return [(max(0.0, start - (overlap if i else 0.0)), end)
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:]))]
+
+
+async def analyze_segments(pool: Any, video_path: str, duration: float, parts: int) -> Dict:
+    if parts == 1:
+        return await pool.run(ANALYZE_VIDEO, video_path)
+
+    segments = plan_segments(duration, parts, config.SEGMENT_OVERLAP_SECONDS)
+    logger.info(f"🧩 Видео {duration:.0f} с делится на {parts} отрезков")
+    jobs = [asyncio.ensure_future(pool.run(EXTRACT_POSE_SEGMENT, video_path, start, end)) for start, end in segments]
+    try:
+        tracks = await asyncio.gather(*jobs)
+    except VideoOpenError:
+        return {'frames': 0, 'detected_frames': 0, 'unreadable': True}
+    finally:
+        for job in jobs:                                                        # Упал один отрезок - остальные не нужны
+            job.cancel()
+    return await pool.run(SCORE_SEGMENTS, list(tracks))
+
+
+async def analyze_shared(pool: Any, video_path: str, parts: int) -> Dict:
+    # Декодер и анализ - две задачи пула, кадры между ними идут через кольцо в общей памяти
+    if parts == 1:
+        return await pool.run(ANALYZE_VIDEO, video_path)
+
+    from analysis.tracks import POSE_INPUT_SIZE
+    from frame_ring import FrameRing, RingAborted
+
+    ring = FrameRing.create(config.FRAME_RING_SLOTS, (POSE_INPUT_SIZE, POSE_INPUT_SIZE, 3))     # Кадр уже уменьшен до входа модели
+    decoder = asyncio.ensure_future(pool.run(DECODE_TO_RING, ring.spec, video_path))
+    analysis = asyncio.ensure_future(pool.run(ANALYZE_RING, ring.spec, video_path))
+    try:
+        await asyncio.wait([decoder, analysis], return_when=asyncio.FIRST_EXCEPTION)
+        error = decoder.exception() if decoder.done() and not decoder.cancelled() else None
+        if error is not None and not isinstance(error, RingAborted):            # Упал декодер - анализ получит RingAborted, причина здесь
+            raise error
+        result = await analysis
+        result['stage_seconds'].update(await decoder)
+        return result
+    except VideoOpenError:
+        return {'frames': 0, 'detected_frames': 0, 'unreadable': True}
+    finally:
+        for job in (decoder, analysis):                                         # Отмена или падение одной стороны останавливает другую
+            job.cancel()
+        await asyncio.gather(decoder, analysis, return_exceptions=True)
+        ring.abort()                                                            # ... даже если флаг отмены не дошел (кончились слоты)
+        ring.close()
+
+
+async def run_analysis(ticket: Ticket, video_path: str, duration: float) -> Dict:
+    # Короткое видео или пул без поддержки отрезков - обычная задача; длинное - сколько отрезков позволят простаивающие воркеры.
+    # Адаптивный анализ не делится: пропуск неподвижных участков и ранняя остановка идут по треку целиком
+    max_parts = min(config.SEGMENT_MAX, int(duration // config.SEGMENT_MIN_SECONDS))
+    if not config.SEGMENT_ANALYSIS or config.ADAPTIVE_ANALYSIS or not scheduler.pool.segmentable or max_parts < 2:
+        if config.FRAME_TRANSPORT == 'shm' and scheduler.pool.shared_memory and not config.ADAPTIVE_ANALYSIS:
+            return await scheduler.run_split(ticket, lambda pool, parts: analyze_shared(pool, video_path, parts), 1)
+        return await scheduler.run(ticket, ANALYZE_VIDEO, video_path)
+    return await scheduler.run_split(
+        ticket, lambda pool, parts: analyze_segments(pool, video_path, duration, parts), max_parts - 1
+    )
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+import os
+
+from aiogram import Bot
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+
+import config
+from handlers.video_handlers import TIMEOUT_MESSAGE, format_analysis_result
+import metrics
+from parallel_analysis import ANALYZE_VIDEO
+from scheduler import QueueFull, scheduler
+from states.analysis_states import AnalysisStates
+from task_manager import task_manager
+from utils.downloads import DownloadedVideo, upload_store
+from utils.fsm_storage import SQLiteStorage
+from utils.results_store import results_store
+
+logger = logging.getLogger(__name__)
+
+
+async def _fail(bot: Bot, state: FSMContext, key: StorageKey, text: str):
+    await state.clear()
+    try:
+        await bot.send_message(key.chat_id, text)
+    except Exception as e:
+        logger.error(f"❌ Не удалось уведомить пользователя {key.user_id}: {e}")
+
+
+async def resume_job(bot: Bot, state: FSMContext, key: StorageKey, download: DownloadedVideo):
+    # Видео пережило перезапуск (tmpfs, процесс упал без очистки) - анализируем заново и отвечаем в чат
+    try:
+        ticket = scheduler.admit(key.user_id)
+    except QueueFull:
+        download.cleanup()
+        await _fail(bot, state, key, "⚠️ Бот был перезапущен, а очередь анализа заполнена. Отправьте видео еще раз.")
+        return
+
+    try:
+        scheduler.enqueue(ticket)
+        analysis_result = await scheduler.run(ticket, ANALYZE_VIDEO, download.path)
+        metrics.observe_stages(analysis_result.pop('stage_seconds', None))
+        results_store.add(key.user_id, analysis_result)
+        await bot.send_message(key.chat_id, format_analysis_result(analysis_result))
+        await state.clear()
+    except asyncio.CancelledError:
+        if task_manager.pop_timed_out(key.user_id):                             # Снята сторожем maintenance, а не через /cancel
+            await _fail(bot, state, key, TIMEOUT_MESSAGE)
+            return
+        raise                                                                   # /cancel сам очищает состояние и отвечает
+    except Exception as e:
+        logger.error(f"❌ Ошибка возобновленного анализа пользователя {key.user_id}: {e}")
+        await _fail(bot, state, key, "❌ Произошла ошибка при обработке видео. Попробуйте еще раз.")
+    finally:
+        scheduler.release(ticket)
+        download.cleanup()
+
+
+async def reconcile_jobs(bot: Bot, storage: SQLiteStorage) -> int:
+    # После перезапуска в хранилище остаются состояния processing_video без задачи в памяти:
+    # либо возобновляем анализ, либо снимаем состояние и сообщаем пользователю
+    resumed = 0
+    for key, data in storage.in_state(AnalysisStates.processing_video):
+        state = FSMContext(storage=storage, key=key)
+        video_path = data.get('video_path')
+        if video_path and os.path.isfile(video_path):
+            task = asyncio.create_task(resume_job(bot, state, key, upload_store.adopt(video_path)))
+            task.add_done_callback(lambda _, user_id=key.user_id: task_manager.remove_completed_task(user_id))
+            task_manager.register_task(key.user_id, task, timeout=config.TASK_TIMEOUT_SECONDS)
+            resumed += 1
+        else:
+            await _fail(bot, state, key, "⚠️ Бот был перезапущен, анализ видео прерван. Отправьте видео еще раз.")
+    if resumed:
+        logger.info(f"🔁 Возобновлено {resumed} прерванных анализов")
+    return resumed
@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import config
+import metrics
+from worker_pool import AnalysisWorkerPool, analysis_pool
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFull(Exception):
+    def __init__(self, retry_after: float):
+        super().__init__(f"Очередь анализа заполнена, повторите через {retry_after:.0f} с")
+        self.retry_after = retry_after
+
+
+class Ticket:
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.admitted_at = time.monotonic()
+        self.enqueued_at = self.admitted_at
+        self.granted: Optional[asyncio.Future] = None
+        self.started = False
+        self.released = False
+
+
+class JobScheduler:
+    # Ограниченная очередь перед пулом: место резервируется до скачивания, выдача - по кругу между пользователями
+    def __init__(self, pool: AnalysisWorkerPool, max_queue: int = config.MAX_QUEUED_JOBS,
+                 initial_job_seconds: float = config.INITIAL_JOB_SECONDS):
+        self.pool = pool
+        self.max_queue = max_queue
+        self.avg_job_seconds = initial_job_seconds
+
+        self._queues: Dict[int, Deque[Ticket]] = {}
+        self._rotation: Deque[int] = deque()                                    # Порядок обхода пользователей
+        self.admitted = 0                                                       # Приняты и еще не завершены
+        self.running = 0
+        self.rejected = 0
+
+    @property
+    def concurrency(self) -> int:
+        return self.pool.max_workers
+
+    @property
+    def waiting(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def admit(self, user_id: int) -> Ticket:
+        # Отказываем сразу, пока видео еще не скачано
+        if self.admitted >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(self.estimate_wait(self.admitted + 1))
+        self.admitted += 1
+        return Ticket(user_id)
+
+    def enqueue(self, ticket: Ticket):
+        ticket.granted = asyncio.get_running_loop().create_future()
+        ticket.enqueued_at = time.monotonic()
+        if ticket.user_id not in self._queues:
+            self._queues[ticket.user_id] = deque()
+            self._rotation.append(ticket.user_id)
+        self._queues[ticket.user_id].append(ticket)
+        self._dispatch()
+
+    def position(self, ticket: Ticket) -> int:
+        # Позиция с учетом кругового обхода: 0 - уже запущена
+        queue = self._queues.get(ticket.user_id)
+        if queue is None or ticket not in queue:
+            return 0
+        depth = queue.index(ticket)
+        ahead = depth
+        before_in_rotation = True
+        for user_id in self._rotation:
+            if user_id == ticket.user_id:
+                before_in_rotation = False
+                continue
+            ahead += min(len(self._queues[user_id]), depth + 1 if before_in_rotation else depth)
+        return ahead + 1
+
+    def estimate_wait(self, position: int) -> float:
+        return math.ceil(position / self.concurrency) * self.avg_job_seconds
+
+    def _next_ticket(self) -> Optional[Ticket]:
+        if not self._rotation:
+            return None
+        user_id = self._rotation.popleft()
+        queue = self._queues[user_id]
+        ticket = queue.popleft()
+        if queue:
+            self._rotation.append(user_id)
+        else:
+            del self._queues[user_id]
+        return ticket
+
+    def _dispatch(self):
+        while self.running < self.concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                return
+            if ticket.granted.done():                                           # Отменили, пока стояла в очереди
+                continue
+            self.running += 1
+            ticket.started = True
+            ticket.granted.set_result(True)
+
+    async def _wait_granted(self, ticket: Ticket):
+        if ticket.granted is None:
+            self.enqueue(ticket)
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            # Слот уже выдан (_dispatch), а задачу отменили до пробуждения: try/finally в run еще не начался
+            if ticket.started:
+                self.running -= 1
+                self._dispatch()
+            raise
+        metrics.observe('wait', time.monotonic() - ticket.enqueued_at)
+
+    async def run(self, ticket: Ticket, fn: Callable, *args, **kwargs) -> Any:
+        await self._wait_granted(ticket)
+
+        started = time.monotonic()
+        try:
+            result = await self.pool.run(fn, *args, **kwargs)
+            elapsed = time.monotonic() - started
+            self.avg_job_seconds += 0.2 * (elapsed - self.avg_job_seconds)    # EWMA фактической длительности
+            return result
+        finally:
+            self.running -= 1
+            self._dispatch()
+
+    async def run_split(self, ticket: Ticket, job: Callable[[Any, int], Awaitable[Any]], max_extra: int) -> Any:
+        # Как run, но если очередь пуста и воркеры простаивают, задача занимает до max_extra
+        # дополнительных слотов: job(pool, parts) сам раскладывает работу на parts задач пула
+        await self._wait_granted(ticket)
+
+        extra = 0
+        if not self._rotation:
+            extra = max(0, min(max_extra, self.concurrency - self.running))
+            self.running += extra
+        started = time.monotonic()
+        try:
+            result = await job(self.pool, 1 + extra)
+            if not extra:                                                       # Оценка ожидания - в задачах на один слот
+                self.avg_job_seconds += 0.2 * (time.monotonic() - started - self.avg_job_seconds)
+            return result
+        finally:
+            self.running -= 1 + extra
+            self._dispatch()
+
+    def release(self, ticket: Ticket):
+        # Вызывается всегда: после результата, ошибки скачивания или отмены
+        if ticket.released:
+            return
+        ticket.released = True
+        self.admitted -= 1
+        if ticket.started:
+            return
+        queue = self._queues.get(ticket.user_id)
+        if queue is not None and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.user_id]
+                self._rotation.remove(ticket.user_id)
+        if ticket.granted is not None and not ticket.granted.done():
+            ticket.granted.cancel()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'admitted': self.admitted,
+            'waiting': self.waiting,
+            'running': self.running,
+            'rejected': self.rejected,
+            'avg_job_seconds': round(self.avg_job_seconds, 2),
+        }
+
+
+def create_pool():
+    if config.ANALYSIS_MODE == 'broker':
+        from broker import BrokerPool
+        return BrokerPool()
+    return analysis_pool
+
+
+scheduler = JobScheduler(create_pool())
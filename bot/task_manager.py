@@ -1,5 +1,6 @@
 import asyncio
-from typing import Dict
+import time
+from typing import Dict, Optional, Set, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
@@ -7,10 +8,19 @@ logger = logging.getLogger(__name__)
 class TaskManager:
     def __init__(self):
         self.active_tasks: Dict[int, asyncio.Task] = {}
+        self.deadlines: Dict[int, float] = {}                   # time.monotonic(), после которого задачу снимает сторож
+        self.timed_out: Set[int] = set()                        # Сняты сторожем - обработчик сообщает о таймауте, а не об отмене
     
-    def register_task(self, user_id: int, task: asyncio.Task):
+    def register_task(self, user_id: int, task: asyncio.Task, timeout: Optional[float] = None):
         self.active_tasks[user_id] = task
+        self.deadlines.pop(user_id, None)
+        if timeout:
+            self.deadlines[user_id] = time.monotonic() + timeout
         logger.info(f"📝 Зарегистрирована задача для пользователя {user_id}")
+
+    def _forget(self, user_id: int):
+        self.active_tasks.pop(user_id, None)
+        self.deadlines.pop(user_id, None)
     
     async def cancel_user_task(self, user_id: int) -> bool:
         if user_id in self.active_tasks:
@@ -22,19 +32,43 @@ class TaskManager:
                 except asyncio.CancelledError:
                     logger.info(f"✅ Задача пользователя {user_id} успешно отменена")
                 finally:
-                    self.active_tasks.pop(user_id, None)
+                    self._forget(user_id)
                     return True
             else:
-                self.active_tasks.pop(user_id, None)
+                self._forget(user_id)
         return False
     
     def remove_completed_task(self, user_id: int):
         if user_id in self.active_tasks and self.active_tasks[user_id].done():
-            self.active_tasks.pop(user_id, None)
+            self._forget(user_id)
             logger.info(f"🗑️ Удалена завершенная задача пользователя {user_id}")
 
     def has_active_task(self, user_id: int) -> bool:
         return user_id in self.active_tasks and not self.active_tasks[user_id].done()
 
+    def pop_timed_out(self, user_id: int) -> bool:
+        if user_id in self.timed_out:
+            self.timed_out.discard(user_id)
+            return True
+        return False
+
+    def reap(self, now: Optional[float] = None) -> Tuple[int, int]:
+        # Вызывается обслуживанием: убирает завершенные задачи, которые никто не удалил,
+        # и отменяет просроченные - запись удалит их обработчик (или следующий проход)
+        now = now if now is not None else time.monotonic()
+        removed = timed_out = 0
+        for user_id, task in list(self.active_tasks.items()):
+            if task.done():
+                self._forget(user_id)
+                removed += 1
+            elif now >= self.deadlines.get(user_id, float('inf')):
+                logger.warning(f"⌛ Задача пользователя {user_id} превысила лимит времени, отменяем")
+                self.timed_out.add(user_id)
+                self.deadlines.pop(user_id, None)
+                task.cancel()
+                timed_out += 1
+        self.timed_out &= set(self.active_tasks)                # Обработчик уже не спросит - пользователь ушел
+        return removed, timed_out
+
 
-task_manager = TaskManager() 
\ No newline at end of file
+task_manager = TaskManager() 
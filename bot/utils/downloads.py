@@ -0,0 +1,141 @@
+import logging
+import os
+import shutil
+import time
+from typing import Optional, Set, Tuple
+
+import config
+from utils.result_cache import HashingWriter
+
+logger = logging.getLogger(__name__)
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+def default_upload_dir() -> str:
+    # tmpfs: файл живет в памяти, декодер читает его без обращения к диску
+    if config.UPLOAD_DIR:
+        return config.UPLOAD_DIR
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        return '/dev/shm/fitness_bot_uploads'
+    return 'uploads/videos'
+
+
+def directory_usage(directory: str) -> int:
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+    except FileNotFoundError:
+        return 0
+
+
+class DownloadedVideo:
+    def __init__(self, store: 'UploadStore', path: str, reserved: int):
+        self.store = store
+        self.path = path
+        self.reserved = reserved
+        self.size = 0
+        self.sha256: Optional[str] = None
+        self.seconds = 0.0
+
+    def cleanup(self):
+        # Вызывается всегда: после успеха, ошибки или отмены
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"❌ Не удалось удалить {self.path}: {e}")
+        self.store._release(self)
+
+
+class UploadStore:
+    def __init__(self, directory: Optional[str] = None, quota_bytes: int = config.UPLOAD_QUOTA_MB * 1024 * 1024,
+                 chunk_size: int = config.DOWNLOAD_CHUNK_SIZE):
+        self.directory = os.path.abspath(directory or default_upload_dir())      # Путь уходит воркерам в других процессах
+        self.quota_bytes = quota_bytes
+        self.chunk_size = chunk_size
+        self._reserved = 0                                                      # Байты скачиваемых сейчас файлов
+        self._in_use: Set[str] = set()                                          # Файлы, которые еще нужны обработчику или анализу
+
+    def _reserve(self, size: int) -> int:
+        # Место под файл резервируем до скачивания, чтобы параллельные загрузки не пробили квоту.
+        # Квота - не больше свободного места: /dev/shm в Docker по умолчанию всего 64 МБ, иначе будет ENOSPC
+        used = directory_usage(self.directory)
+        if used + self._reserved + size > self.quota_bytes:
+            raise QuotaExceeded(
+                f"Папка загрузок заполнена: {(used + self._reserved) // (1024 * 1024)} МБ "
+                f"из {self.quota_bytes // (1024 * 1024)} МБ"
+            )
+        free = shutil.disk_usage(self.directory).free
+        if self._reserved + size > free:                                        # Уже скачанная часть резерва учтена дважды - с запасом
+            raise QuotaExceeded(
+                f"Мало места в {self.directory}: свободно {free // (1024 * 1024)} МБ, "
+                f"нужно {(self._reserved + size) // (1024 * 1024)} МБ"
+            )
+        self._reserved += size
+        return size
+
+    def _release(self, download: DownloadedVideo):
+        self._reserved -= download.reserved
+        download.reserved = 0
+        self._in_use.discard(download.path)
+
+    def adopt(self, path: str) -> DownloadedVideo:
+        # Файл, скачанный до перезапуска (recovery): очистка не тронет его, пока анализ не закончится
+        download = DownloadedVideo(self, os.path.abspath(path), 0)
+        download.size = os.path.getsize(download.path)
+        self._in_use.add(download.path)
+        return download
+
+    def evict(self, max_age: float, max_bytes: int, now: Optional[float] = None) -> Tuple[int, int]:
+        # Файлы без владельца (процесс упал между скачиванием и cleanup): сначала старше max_age,
+        # затем самые старые, пока папка больше max_bytes. Используемые файлы не трогаем
+        now = now if now is not None else time.time()
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        except FileNotFoundError:
+            return 0, 0
+        files = sorted(((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in entries))
+        used = sum(size for _, size, _ in files)
+        removed = freed = 0
+        for mtime, size, path in files:
+            if now - mtime < max_age and used <= max_bytes:
+                break
+            if path in self._in_use:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"❌ Не удалось удалить {path}: {e}")
+                continue
+            used -= size
+            removed += 1
+            freed += size
+        return removed, freed
+
+    async def fetch(self, bot, file_id: str, filename: str, expected_size: int) -> DownloadedVideo:
+        os.makedirs(self.directory, exist_ok=True)
+        download = DownloadedVideo(self, os.path.join(self.directory, filename), self._reserve(expected_size))
+        self._in_use.add(download.path)
+
+        started = time.perf_counter()
+        try:
+            file_info = await bot.get_file(file_id)
+            with open(download.path, 'wb') as video_file:                      # Пишем чанками по ходу приема
+                writer = HashingWriter(video_file)
+                await bot.download_file(file_info.file_path, writer, chunk_size=self.chunk_size, seek=False)
+        except BaseException:
+            download.cleanup()
+            raise
+
+        download.size = writer.size
+        download.sha256 = writer.hexdigest()
+        download.seconds = time.perf_counter() - started
+        return download
+
+
+upload_store = UploadStore()
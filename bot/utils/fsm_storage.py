@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import marshal
+import os
+import sqlite3
+import sys
+from typing import Any, Dict, Iterator, Mapping, Optional, Set, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+
+import config
+
+logger = logging.getLogger(__name__)
+
+MARSHAL_VERSION = 4
+# marshal не гарантирует совместимость между версиями Python - формат базы пишется в таблицу meta,
+# и при несовпадении (обновили Python) сохраненные состояния сбрасываются, а не читаются наугад
+STORAGE_FORMAT = f"marshal{MARSHAL_VERSION}-py{sys.version_info.major}.{sys.version_info.minor}"
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+
+def encode_key(key: StorageKey) -> bytes:
+    return marshal.dumps((key.bot_id, key.chat_id, key.user_id, key.thread_id,
+                          key.business_connection_id, key.destiny), MARSHAL_VERSION)
+
+
+def decode_key(blob: bytes) -> StorageKey:
+    return StorageKey(*marshal.loads(blob))
+
+
+class SQLiteStorage(BaseStorage):
+    # FSM в памяти + отложенная запись в SQLite: обработчик не ждет диска, изменения
+    # сбрасываются одной транзакцией раз в flush_interval. Состояние и данные - одним marshal-блобом
+    def __init__(self, path: str = config.FSM_DB, flush_interval: float = config.FSM_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_interval = flush_interval
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS fsm (key BLOB PRIMARY KEY, value BLOB NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._check_format()
+
+        self._entries: Dict[StorageKey, Tuple[Optional[str], Dict[str, Any]]] = {}
+        broken = []
+        for key, value in self._connection.execute("SELECT key, value FROM fsm"):
+            try:
+                self._entries[decode_key(key)] = marshal.loads(value)
+            except (EOFError, ValueError, TypeError):                           # Поврежденная строка - удаляем, остальные читаем
+                broken.append((key,))
+        if broken:
+            logger.warning(f"⚠️ Удалено {len(broken)} нечитаемых FSM-состояний")
+            self._connection.executemany("DELETE FROM fsm WHERE key = ?", broken)
+        logger.info(f"💾 Загружено {len(self._entries)} FSM-состояний из {path}")
+
+        self._dirty: Set[StorageKey] = set()
+        self._flusher: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    def _check_format(self):
+        row = self._connection.execute("SELECT value FROM meta WHERE name = 'format'").fetchone()
+        if row is not None and row[0] == STORAGE_FORMAT:
+            return
+        if row is not None:
+            logger.warning(f"⚠️ Формат FSM-базы {row[0]} вместо {STORAGE_FORMAT}: сохраненные состояния сброшены")
+            self._connection.execute("DELETE FROM fsm")
+        self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('format', ?)", (STORAGE_FORMAT,))
+
+    def _touch(self, key: StorageKey, state: Optional[str], data: Dict[str, Any]):
+        if state is None and not data:
+            self._entries.pop(key, None)
+        else:
+            self._entries[key] = (state, data)
+        self._dirty.add(key)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        _, data = self._entries.get(key, (None, {}))
+        self._touch(key, _state_name(state), data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._entries.get(key, (None, None))[0]
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        state, _ = self._entries.get(key, (None, {}))
+        self._touch(key, state, dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict(self._entries.get(key, (None, {}))[1])
+
+    def in_state(self, state: StateType) -> Iterator[Tuple[StorageKey, Dict[str, Any]]]:
+        name = _state_name(state)
+        for key, (current, data) in list(self._entries.items()):
+            if current == name:
+                yield key, dict(data)
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _write(self, upserts, deletes):
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany("INSERT OR REPLACE INTO fsm VALUES (?, ?)", upserts)
+            connection.executemany("DELETE FROM fsm WHERE key = ?", deletes)
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def flush(self):
+        async with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            if not dirty:
+                return
+            upserts, deletes = [], []
+            for key in dirty:
+                entry = self._entries.get(key)
+                if entry is None:
+                    deletes.append((encode_key(key),))
+                    continue
+                try:
+                    upserts.append((encode_key(key), marshal.dumps(entry, MARSHAL_VERSION)))
+                except ValueError:                                              # marshal - только базовые типы
+                    # Старая строка в базе устарела: после перезапуска лучше начать заново, чем вернуть прошлый шаг
+                    logger.error(f"❌ FSM-данные {key} не сериализуются и не будут сохранены")
+                    deletes.append((encode_key(key),))
+            try:
+                await asyncio.to_thread(self._write, upserts, deletes)
+            except sqlite3.Error as e:
+                logger.error(f"❌ Не удалось сохранить FSM-состояния: {e}")
+                self._dirty |= dirty                                            # Повторим при следующем сбросе
+
+    async def close(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
+        self._connection.close()
+
+
+def create_fsm_storage() -> BaseStorage:
+    if config.FSM_STORAGE == 'sqlite':
+        return SQLiteStorage()
+    return MemoryStorage()
@@ -1,43 +1,202 @@
+import asyncio
+import math
+import sqlite3
 import time
-from typing import Dict, List, Tuple
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
 import logging
 
+import config
+
 logger = logging.getLogger(__name__)
 
-class RateLimiter:
+SWEEP_BATCH = 10_000            # Сколько записей очистка удаляет, прежде чем отдать управление циклу событий
+
+
+class WindowState:
+    # Счетчик скользящего окна: фиксированный размер на пользователя вместо списка меток времени
+    __slots__ = ('window_start', 'current', 'previous')
+
+    def __init__(self, window_start: float = 0.0, current: int = 0, previous: int = 0):
+        self.window_start = window_start
+        self.current = current
+        self.previous = previous
+
+
+def slide_window(state: WindowState, now: float, max_requests: int, time_window: float) -> Tuple[bool, int, float]:
+    # Оценка числа запросов за последние time_window секунд: previous * (доля окна) + current
+    window_start = now - now % time_window
+    if state.window_start != window_start:
+        state.previous = state.current if window_start - state.window_start == time_window else 0
+        state.current = 0
+        state.window_start = window_start
+
+    elapsed = (now - window_start) / time_window
+    estimated = state.previous * (1 - elapsed) + state.current
+    remaining_requests = max(0, max_requests - math.ceil(estimated))
+
+    if estimated + 1 > max_requests:
+        if state.current >= max_requests:                                       # Ждем следующего окна, пока вклад current не спадет
+            wait_time = window_start + time_window * (2 - (max_requests - 1) / state.current) - now
+        else:
+            wait_time = window_start + time_window * (1 - (max_requests - 1 - state.current) / state.previous) - now
+        return True, remaining_requests, max(0.0, wait_time)
+
+    state.current += 1
+    return False, remaining_requests, 0.0
+
+
+class RateLimitBackend(ABC):
+    # Хранилище состояний; общий бэкенд (SQLite, Redis) позволяет нескольким инстансам бота держать один лимит
+    @abstractmethod
+    async def hit(self, action: str, user_id: int, max_requests: int, time_window: float,
+                  now: float) -> Tuple[bool, int, float]:
+        ...
+
+    @abstractmethod
+    async def sweep(self, now: float, idle_seconds: float) -> int:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+
+class MemoryBackend(RateLimitBackend):
     def __init__(self):
-        self.user_requests: Dict[int, List[float]] = {}
-    
-    async def check_rate_limit(self, user_id: int, max_requests: int = 3, time_window: int = 60) -> Tuple[bool, int, float]:
-
-        current_time = time.time()
-        
-        if user_id not in self.user_requests:
-            self.user_requests[user_id] = []
-        
-        user_requests = self.user_requests[user_id]
-        recent_requests = [
-            req_time for req_time in user_requests 
-            if current_time - req_time < time_window
-        ]
-        
-        requests_count = len(recent_requests)
-        is_limited = requests_count >= max_requests
-        remaining_requests = max(0, max_requests - requests_count)
-        
-        wait_time = 0.0
-        if is_limited and recent_requests:
-            oldest_request = min(recent_requests)
-            wait_time = max(0, time_window - (current_time - oldest_request))
-        
+        # Для каждого действия - OrderedDict по времени последнего запроса: давно неактивные всегда в начале
+        self.tables: Dict[str, "OrderedDict[int, WindowState]"] = {}
+
+    async def hit(self, action, user_id, max_requests, time_window, now):
+        table = self.tables.setdefault(action, OrderedDict())
+        state = table.get(user_id)
+        if state is None:
+            state = table[user_id] = WindowState()
+        else:
+            table.move_to_end(user_id)
+        return slide_window(state, now, max_requests, time_window)
+
+    async def sweep(self, now, idle_seconds):
+        # Порциями: миллион пользователей - это ~1 с, обработчики не должны ждать ее целиком
+        removed = 0
+        for table in list(self.tables.values()):
+            while table:
+                user_id, state = next(iter(table.items()))
+                if state.window_start >= now - idle_seconds:
+                    break
+                table.popitem(last=False)
+                removed += 1
+                if removed % SWEEP_BATCH == 0:
+                    await asyncio.sleep(0)
+        return removed
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+
+class SQLiteBackend(RateLimitBackend):
+    # Общий для всех процессов на одной машине файл; операции - в потоке, чтобы не блокировать цикл событий
+    def __init__(self, path: str):
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            " action TEXT NOT NULL, user_id INTEGER NOT NULL,"
+            " window_start REAL NOT NULL, current INTEGER NOT NULL, previous INTEGER NOT NULL,"
+            " PRIMARY KEY (action, user_id)) WITHOUT ROWID"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS rate_limits_window ON rate_limits (window_start)")
+        self._lock = asyncio.Lock()
+
+    def _hit(self, action, user_id, max_requests, time_window, now):
+        connection = self._connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT window_start, current, previous FROM rate_limits WHERE action = ? AND user_id = ?",
+                (action, user_id),
+            ).fetchone()
+            state = WindowState(*row) if row else WindowState()
+            result = slide_window(state, now, max_requests, time_window)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?)",
+                (action, user_id, state.window_start, state.current, state.previous),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return result
+
+    async def hit(self, action, user_id, max_requests, time_window, now):
+        async with self._lock:
+            return await asyncio.to_thread(self._hit, action, user_id, max_requests, time_window, now)
+
+    async def sweep(self, now, idle_seconds):
+        async with self._lock:
+            cursor = await asyncio.to_thread(
+                self._connection.execute, "DELETE FROM rate_limits WHERE window_start < ?", (now - idle_seconds,)
+            )
+        return cursor.rowcount
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+
+def create_backend() -> RateLimitBackend:
+    if config.RATE_LIMIT_DB:
+        return SQLiteBackend(config.RATE_LIMIT_DB)
+    return MemoryBackend()
+
+
+class RateLimiter:
+    def __init__(self, backend: Optional[RateLimitBackend] = None,
+                 limits: Optional[Dict[str, Tuple[int, float]]] = None,
+                 sweep_interval: float = config.RATE_LIMIT_SWEEP_INTERVAL,
+                 clock: Callable[[], float] = time.time):
+        self.backend = backend if backend is not None else create_backend()
+        self.limits = limits or dict(config.RATE_LIMITS)
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._next_sweep = clock() + sweep_interval                            # Очистку запускает обслуживание, не запрос пользователя
+
+    def limit_for(self, action: str = 'analysis') -> int:
+        return self.limits[action][0]
+
+    async def check_rate_limit(self, user_id: int, action: str = 'analysis') -> Tuple[bool, int, float]:
+        max_requests, time_window = self.limits[action]
+        current_time = self.clock()
+
+        is_limited, remaining_requests, wait_time = await self.backend.hit(
+            action, user_id, max_requests, time_window, current_time
+        )
         if not is_limited:
-            recent_requests.append(current_time)
-            self.user_requests[user_id] = recent_requests
-            logger.info(f"✅ Запрос пользователя {user_id} добавлен. Всего: {len(recent_requests)}/{max_requests}")
+            logger.info(f"✅ Запрос пользователя {user_id} ({action}) учтен. Осталось: {remaining_requests - 1}/{max_requests}")
         else:
-            logger.warning(f"❌ Пользователь {user_id} превысил лимит: {requests_count}/{max_requests}")
-        
+            logger.warning(f"❌ Пользователь {user_id} превысил лимит {action}: {max_requests}/{int(time_window)} с")
+
         return is_limited, remaining_requests, wait_time
 
+    async def sweep_if_due(self) -> int:
+        current_time = self.clock()
+        if current_time < self._next_sweep:
+            return 0
+        return await self.sweep(current_time)
+
+    async def sweep(self, current_time: Optional[float] = None) -> int:
+        # Состояние старше двух окон уже ни на что не влияет
+        current_time = current_time or self.clock()
+        self._next_sweep = current_time + self.sweep_interval
+        idle_seconds = 2 * max(window for _, window in self.limits.values())
+        removed = await self.backend.sweep(current_time, idle_seconds)
+        if removed:
+            logger.info(f"🧹 Удалено {removed} неактивных пользователей из лимитера")
+        return removed
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
 
-rate_limiter = RateLimiter()
\ No newline at end of file
+rate_limiter = RateLimiter()
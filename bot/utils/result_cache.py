@@ -0,0 +1,140 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def file_key(file_unique_id: str) -> str:
+    return f"fuid:{file_unique_id}"
+
+
+def content_key(digest: str) -> str:
+    return f"sha256:{digest}"
+
+
+class HashingWriter:
+    # Обертка над файлом для bot.download_file: хеш считается по ходу скачивания, без повторного чтения
+    def __init__(self, file: BinaryIO):
+        self.file = file
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> int:
+        self._sha256.update(chunk)
+        self.size += len(chunk)
+        return self.file.write(chunk)
+
+    def flush(self):
+        self.file.flush()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self.file.seek(offset, whence)
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+
+class ResultCache:
+    # LRU с TTL: ключ - file_unique_id от Telegram (до скачивания) или sha256 содержимого (после)
+    def __init__(self, max_entries: int = config.RESULT_CACHE_SIZE, ttl: float = config.RESULT_CACHE_TTL,
+                 persist_path: Optional[str] = config.RESULT_CACHE_PATH or None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False                                                     # Есть изменения, не записанные на диск
+        self._flush_lock = asyncio.Lock()
+
+        if persist_path:
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, result: Dict[str, Any], *keys: str):
+        expires_at = time.time() + self.ttl
+        for key in keys:
+            self._entries[key] = (expires_at, result)
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        self._dirty = True                                                      # На диск - в flush() из обслуживания, не в цикле событий
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        # get() удаляет просроченное только при обращении - остальное снимает обслуживание
+        now = now if now is not None else time.time()
+        expired = [key for key, (expires_at, _) in self._entries.items() if expires_at < now]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._dirty = True
+        return len(expired)
+
+    async def flush(self) -> bool:
+        # Снимок берется в цикле событий, сериализация и запись файла - в потоке
+        if not self.persist_path or not self._dirty:
+            return False
+        async with self._flush_lock:
+            if not self._dirty:
+                return False
+            snapshot = dict(self._entries)
+            self._dirty = False
+            if not await asyncio.to_thread(self._save, snapshot):
+                self._dirty = True                                              # Повторим при следующем обслуживании
+                return False
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def _load(self):
+        try:
+            with open(self.persist_path, encoding='utf-8') as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"❌ Не удалось прочитать кэш результатов {self.persist_path}: {e}")
+            return
+
+        now = time.time()
+        for key, (expires_at, result) in stored.items():
+            if expires_at > now:
+                self._entries[key] = (expires_at, result)
+        logger.info(f"📦 Загружено {len(self._entries)} результатов из кэша")
+
+    def _save(self, entries: Dict[str, Tuple[float, Dict[str, Any]]]) -> bool:
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.persist_path) or '.', exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error(f"❌ Не удалось сохранить кэш результатов: {e}")
+            return False
+        return True
+
+
+result_cache = ResultCache()
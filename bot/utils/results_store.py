@@ -0,0 +1,163 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class StoredResult(NamedTuple):
+    id: int
+    created_at: float
+    exercise: str
+    reps: int
+    technique_score: int
+    amplitude_deg: Optional[float]
+    tempo_sec: Optional[float]
+
+
+class ExerciseSummary(NamedTuple):
+    exercise: str
+    count: int
+    best_score: int
+    avg_amplitude: Optional[float]
+    last_at: float
+
+
+class ResultsStore:
+    # История анализов в SQLite (WAL). Запись - пачками из буфера, сводки по упражнениям
+    # обновляются инкрементально при каждой вставке, поэтому чтение не сканирует историю
+    def __init__(self, path: str = config.RESULTS_DB, flush_interval: float = config.RESULTS_FLUSH_INTERVAL,
+                 batch_size: int = config.RESULTS_BATCH_SIZE):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._connection: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple[int, float, str, Dict[str, Any]]] = []
+        self._lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.written = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL, created_at REAL NOT NULL,"
+                " exercise TEXT NOT NULL, reps INTEGER NOT NULL, technique_score INTEGER NOT NULL,"
+                " amplitude_deg REAL, tempo_sec REAL, payload TEXT NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_user_time ON results (user_id, created_at)")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                " user_id INTEGER NOT NULL, exercise TEXT NOT NULL, count INTEGER NOT NULL,"
+                " best_score INTEGER NOT NULL, amplitude_sum REAL NOT NULL, amplitude_count INTEGER NOT NULL,"
+                " last_at REAL NOT NULL, PRIMARY KEY (user_id, exercise)) WITHOUT ROWID"
+            )
+            self._connection = connection
+        return self._connection
+
+    def add(self, user_id: int, result: Dict[str, Any]):
+        # Сохраняем только результаты с выделенными повторениями; запись - в фоне
+        if not result.get('reps'):
+            return
+        self._pending.append((user_id, time.time(), result.get('primary_joint') or 'unknown', result))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_later())
+        elif len(self._pending) >= self.batch_size:
+            asyncio.create_task(self.flush())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _write(self, batch):
+        connection = self._connect()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT INTO results (user_id, created_at, exercise, reps, technique_score,"
+                " amplitude_deg, tempo_sec, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(user_id, created_at, exercise, result['reps'], result['technique_score'],
+                  result.get('amplitude_deg'), result.get('tempo_sec'), json.dumps(result, ensure_ascii=False))
+                 for user_id, created_at, exercise, result in batch],
+            )
+            connection.executemany(
+                "INSERT INTO summaries VALUES (?, ?, 1, ?, ?, ?, ?)"
+                " ON CONFLICT (user_id, exercise) DO UPDATE SET"
+                " count = count + 1, best_score = max(best_score, excluded.best_score),"
+                " amplitude_sum = amplitude_sum + excluded.amplitude_sum,"
+                " amplitude_count = amplitude_count + excluded.amplitude_count, last_at = excluded.last_at",
+                [(user_id, exercise, result['technique_score'], result.get('amplitude_deg') or 0.0,
+                  int(result.get('amplitude_deg') is not None), created_at)
+                 for user_id, created_at, exercise, result in batch],
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def flush(self) -> int:
+        async with self._lock:
+            batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except sqlite3.Error as e:
+                logger.error(f"❌ Не удалось сохранить {len(batch)} результатов: {e}")
+                self._pending[:0] = batch                                       # Повторим при следующем сбросе
+                return 0
+            self.written += len(batch)
+            return len(batch)
+
+    async def _flush_for(self, user_id: int):
+        # Свежий результат пользователя должен быть виден сразу, не дожидаясь таймера
+        if any(pending[0] == user_id for pending in self._pending):
+            await self.flush()
+
+    def _history(self, user_id, limit, before):
+        rows = self._connect().execute(
+            "SELECT id, created_at, exercise, reps, technique_score, amplitude_deg, tempo_sec FROM results"
+            " WHERE user_id = ? AND created_at < ? ORDER BY created_at DESC LIMIT ?",
+            (user_id, before if before is not None else float('inf'), limit),
+        ).fetchall()
+        return [StoredResult(*row) for row in rows]
+
+    async def history(self, user_id: int, limit: int = config.RESULTS_PAGE_SIZE,
+                      before: Optional[float] = None) -> List[StoredResult]:
+        # Постраничный вывод по индексу (user_id, created_at): следующая страница - before=created_at последней записи
+        await self._flush_for(user_id)
+        return await asyncio.to_thread(self._history, user_id, limit, before)
+
+    def _summaries(self, user_id):
+        rows = self._connect().execute(
+            "SELECT exercise, count, best_score,"
+            " CASE WHEN amplitude_count > 0 THEN amplitude_sum / amplitude_count END, last_at"
+            " FROM summaries WHERE user_id = ? ORDER BY last_at DESC",
+            (user_id,),
+        ).fetchall()
+        return [ExerciseSummary(*row) for row in rows]
+
+    async def summaries(self, user_id: int) -> List[ExerciseSummary]:
+        await self._flush_for(user_id)
+        return await asyncio.to_thread(self._summaries, user_id)
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+        await self.flush()
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+results_store = ResultsStore()
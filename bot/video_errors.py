@@ -0,0 +1,3 @@
+class VideoOpenError(Exception):
+    # Отдельно от OpenCV.py: исключение приходит из воркера, и его распаковка в боте не должна тянуть cv2
+    pass
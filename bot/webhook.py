@@ -0,0 +1,118 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class LimitedRequestHandler(SimpleRequestHandler):
+    # Отвечаем Telegram сразу, а обработчики выполняем в фоне не больше max_handlers одновременно.
+    # Если очередь переполнена или идет остановка - 503, и Telegram доставит обновление повторно
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_handlers: int = config.WEBHOOK_MAX_HANDLERS,
+                 max_backlog: int = config.WEBHOOK_MAX_BACKLOG, drain_seconds: float = config.WEBHOOK_DRAIN_SECONDS,
+                 record_path: str = config.WEBHOOK_RECORD_PATH, **kwargs: Any):
+        super().__init__(dispatcher, bot, handle_in_background=True, **kwargs)
+        self.max_handlers = max_handlers
+        self.max_backlog = max_backlog
+        self.drain_seconds = drain_seconds
+        self.record_path = record_path
+        self._semaphore = asyncio.Semaphore(max_handlers)
+        self.draining = False
+        self.received = 0
+        self.rejected = 0
+        self.processed = 0
+
+    async def _background_feed_update(self, bot: Bot, update: Dict[str, Any]) -> None:
+        async with self._semaphore:
+            try:
+                await super()._background_feed_update(bot, update)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработки обновления {update.get('update_id')}: {e}")
+            finally:
+                self.processed += 1
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        if self.draining or len(self._background_feed_update_tasks) >= self.max_handlers + self.max_backlog:
+            self.rejected += 1
+            return web.Response(status=503, headers={'Retry-After': '1'})
+        self.received += 1
+        if self.record_path:
+            with open(self.record_path, 'a', encoding='utf-8') as record_file:
+                record_file.write(json.dumps(await request.json(), ensure_ascii=False) + '\n')
+        return await super()._handle_request_background(bot, request)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._background_feed_update_tasks)
+
+    async def drain(self, timeout: Optional[float] = None):
+        # Новые обновления не принимаем, уже принятые даем доработать; по таймауту - отменяем
+        self.draining = True
+        tasks = set(self._background_feed_update_tasks)
+        if not tasks:
+            return
+        logger.info(f"⏳ Ожидание {len(tasks)} обработчиков перед остановкой")
+        _, pending = await asyncio.wait(tasks, timeout=self.drain_seconds if timeout is None else timeout)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.warning(f"🛑 Отменено {len(pending)} незавершенных обработчиков")
+            await asyncio.wait(pending)
+
+    async def close(self) -> None:
+        await self.drain()
+        await super().close()
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            'received': self.received,
+            'rejected': self.rejected,
+            'processed': self.processed,
+            'in_flight': self.in_flight,
+        }
+
+
+def create_app(dispatcher: Dispatcher, bot: Bot, **handler_kwargs: Any) -> web.Application:
+    app = web.Application()
+    handler = LimitedRequestHandler(dispatcher, bot, secret_token=config.WEBHOOK_SECRET or None, **handler_kwargs)
+    handler.register(app, path=config.WEBHOOK_PATH)
+    setup_application(app, dispatcher, bot=bot)
+    app['webhook_handler'] = handler
+    return app
+
+
+async def start_server(app: web.Application, host: str = config.WEBHOOK_HOST,
+                       port: int = config.WEBHOOK_PORT) -> web.AppRunner:
+    runner = web.AppRunner(app, keepalive_timeout=config.WEBHOOK_KEEPALIVE, access_log=None,
+                           shutdown_timeout=config.WEBHOOK_DRAIN_SECONDS)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+async def run_webhook(dispatcher: Dispatcher, bot: Bot):
+    if not config.WEBHOOK_URL:
+        raise RuntimeError("WEBHOOK_URL не задан")
+
+    async def on_startup():
+        await bot.set_webhook(
+            config.WEBHOOK_URL.rstrip('/') + config.WEBHOOK_PATH,
+            secret_token=config.WEBHOOK_SECRET or None,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+            max_connections=config.WEBHOOK_MAX_CONNECTIONS,
+        )
+
+    dispatcher.startup.register(on_startup)
+    runner = await start_server(create_app(dispatcher, bot))
+    logger.info(f"🌐 Webhook слушает {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()                                                  # Закрывает сокет, затем ждет обработчики
@@ -0,0 +1,248 @@
+import asyncio
+import concurrent.futures
+import functools
+import importlib
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import config
+from broker import resolve_target
+
+logger = logging.getLogger(__name__)
+
+CANCEL_SLOTS = 1024             # Сколько задач (в очереди + в работе) можно отменять одновременно
+# Импортируются при старте воркера, а не на первом видео
+PRELOAD_MODULES = ('analysis.pipeline', 'analysis.segments', 'analysis.shared_frames')
+
+_worker_init_seconds = 0.0
+_cancel_flags = None
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def default_pool_size() -> int:
+    if config.ANALYSIS_WORKERS > 0:
+        return config.ANALYSIS_WORKERS
+    return max(1, (os.cpu_count() or 2) - 1)                                    # Одно ядро оставляем боту
+
+
+def _init_worker(cancel_flags):
+    # Выполняется один раз в каждом процессе: импорт cv2/mediapipe/scipy и загрузка модели.
+    # Бот эти модули не импортирует - задачи приходят строками "модуль:функция"
+    global _worker_init_seconds, _cancel_flags
+    started = time.perf_counter()
+    _cancel_flags = cancel_flags
+    for module_name in PRELOAD_MODULES:
+        importlib.import_module(module_name)
+    from analysis.pose import init_pose_worker
+    init_pose_worker()
+    _worker_init_seconds = time.perf_counter() - started
+
+
+def _worker_rss_mb() -> float:
+    import psutil
+    return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def _ping() -> Tuple[int, float]:
+    return os.getpid(), _worker_init_seconds
+
+
+def _check_cancelled(slot: int):
+    # Вызывается из цикла по кадрам: чтение одного байта общей памяти
+    if _cancel_flags[slot]:
+        raise JobCancelled()
+
+
+def _run_task(slot: int, fn: Union[str, Callable], args: tuple, kwargs: dict) -> Tuple[Any, float]:
+    if isinstance(fn, str):
+        fn = resolve_target(fn)
+    if slot >= 0:
+        cancel_check = functools.partial(_check_cancelled, slot)
+        cancel_check()                                                          # Отменили, пока задача стояла в очереди
+        kwargs = dict(kwargs, cancel_check=cancel_check)
+    result = fn(*args, **kwargs)
+    return result, _worker_rss_mb()
+
+
+class AnalysisJob:
+    def __init__(self, pool: 'AnalysisWorkerPool', slot: int, future: concurrent.futures.Future,
+                 executor: concurrent.futures.ProcessPoolExecutor):
+        self.pool = pool
+        self.slot = slot
+        self.future = future
+        self.executor = executor
+
+    def cancel(self):
+        # Флаг видит воркер в цикле по кадрам; future.cancel() снимает задачу, если она еще в очереди
+        if self.slot >= 0:
+            self.pool._cancel_flags[self.slot] = 1
+        self.future.cancel()
+
+    async def result(self) -> Any:
+        try:
+            result, rss_mb = await asyncio.wrap_future(self.future)
+        except BrokenProcessPool:
+            # Воркер умер посреди задачи (OOM, падение OpenCV/MediaPipe): эта задача потеряна,
+            # но следующие должны пойти в новый пул, а не падать до перезапуска бота
+            self.pool._replace_broken(self.executor)
+            raise
+        self.pool._after_task(self.executor, rss_mb)
+        return result
+
+
+class AnalysisWorkerPool:
+    segmentable = True          # Результаты возвращаются объектами Python - можно делить видео на отрезки
+    shared_memory = True        # Воркеры на той же машине - кадры можно передавать через общую память
+
+    def __init__(self, max_workers: Optional[int] = None,
+                 max_tasks: int = config.WORKER_MAX_TASKS,
+                 max_rss_mb: float = config.WORKER_MAX_RSS_MB):
+        self.max_workers = max_workers or default_pool_size()
+        self.max_tasks = max_tasks
+        self.max_rss_mb = max_rss_mb
+
+        self._cancel_flags = multiprocessing.Array('b', CANCEL_SLOTS, lock=False)
+        self._free_slots: List[int] = list(range(CANCEL_SLOTS))
+        self._executor: Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._generation_tasks = 0
+        self.pending = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.warmup_seconds: Optional[float] = None
+        self._warmup_task: Optional[asyncio.Task] = None                       # Прогрев после перезапуска (ссылка - от сборщика мусора)
+
+    def _new_executor(self) -> concurrent.futures.ProcessPoolExecutor:
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers, initializer=_init_worker, initargs=(self._cancel_flags,)
+        )
+
+    async def _warm_up(self, executor: concurrent.futures.ProcessPoolExecutor) -> float:
+        # По пингу на каждый воркер: процессы стартуют сразу, а не на первом видео
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pings = await asyncio.gather(*(loop.run_in_executor(executor, _ping) for _ in range(self.max_workers)))
+        elapsed = time.perf_counter() - started
+        init_times = ", ".join(f"{pid}: {seconds:.2f} с" for pid, seconds in sorted(set(pings)))
+        logger.info(f"🔥 Пул анализа прогрет за {elapsed:.2f} с ({init_times})")
+        return elapsed
+
+    async def start(self):
+        if self._executor is not None:
+            return
+        from frame_ring import sweep_stale_rings                               # numpy - только когда пул действительно стартует
+        sweep_stale_rings()
+        self._executor = self._new_executor()
+        self.warmup_seconds = await self._warm_up(self._executor)
+
+    def submit(self, fn: Union[str, Callable], *args, **kwargs) -> AnalysisJob:
+        # fn (функция или "модуль:функция") должна принимать cancel_check и вызывать его в длинных циклах
+        if self._executor is None:
+            self._executor = self._new_executor()
+
+        slot = self._free_slots.pop() if self._free_slots else -1
+        if slot >= 0:
+            self._cancel_flags[slot] = 0
+        else:
+            logger.warning("⚠️ Закончились слоты отмены, задача будет неотменяемой")
+
+        try:
+            executor, future = self._submit(slot, fn, args, kwargs)
+        except BaseException:
+            if slot >= 0:                                                       # Задача не ушла в пул - слот возвращаем
+                self._free_slots.append(slot)
+            raise
+        self._generation_tasks += 1
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._on_done, slot, f))
+        return AnalysisJob(self, slot, future, executor)
+
+    def _submit(self, slot: int, fn: Union[str, Callable], args: tuple,
+                kwargs: dict) -> Tuple[concurrent.futures.ProcessPoolExecutor, concurrent.futures.Future]:
+        executor = self._executor
+        try:
+            return executor, executor.submit(_run_task, slot, fn, args, kwargs)
+        except BrokenProcessPool:                                               # Сломанный пул не принимает задачи - одна попытка в новом
+            self._replace_broken(executor)
+            executor = self._executor
+            return executor, executor.submit(_run_task, slot, fn, args, kwargs)
+
+    async def run(self, fn: Union[str, Callable], *args, **kwargs) -> Any:
+        job = self.submit(fn, *args, **kwargs)
+        try:
+            return await job.result()
+        except asyncio.CancelledError:
+            job.cancel()
+            raise
+
+    def _on_done(self, slot: int, future: concurrent.futures.Future):
+        # Слот освобождается только когда воркер действительно отпустил задачу
+        self.pending -= 1
+        if slot >= 0:
+            self._free_slots.append(slot)
+        if future.cancelled() or isinstance(future.exception(), JobCancelled):
+            self.cancelled += 1
+        else:
+            self.completed += 1
+
+    def _after_task(self, executor: concurrent.futures.ProcessPoolExecutor, rss_mb: float):
+        # Лимит задач - в среднем на воркер: перезапуск пересоздает все процессы и заново грузит модели.
+        # max_tasks_per_child работает только со spawn/forkserver, а там воркеры не наследуют настройки бота
+        exhausted = self._generation_tasks >= self.max_tasks * self.max_workers
+        if executor is self._executor and (exhausted or rss_mb >= self.max_rss_mb):
+            logger.info(f"♻️ Перезапуск воркеров: задач {self._generation_tasks}, память {rss_mb:.0f} МБ")
+            self._recycle()
+
+    def _replace_broken(self, executor: concurrent.futures.ProcessPoolExecutor):
+        # Задачи сломанного пула падают все разом - пул заменяет только первая из них
+        if executor is self._executor:
+            logger.error("💥 Процесс анализа аварийно завершился, пул воркеров пересоздается")
+            self.crashed += 1
+            self._recycle()
+
+    def _recycle(self):
+        # Новые задачи идут в свежий пул, старый дорабатывает текущие и завершается
+        old_executor = self._executor
+        self._executor = self._new_executor()
+        self._generation_tasks = 0
+        self.recycled += 1
+        old_executor.shutdown(wait=False)
+        self._warmup_task = asyncio.get_running_loop().create_task(self._warm_up(self._executor))
+
+    def metrics(self) -> Dict[str, Any]:
+        busy = min(self.pending, self.max_workers)
+        return {
+            'workers': self.max_workers,
+            'busy_workers': busy,
+            'queue_depth': self.pending - busy,
+            'completed': self.completed,
+            'cancelled': self.cancelled,
+            'recycled': self.recycled,
+            'crashed': self.crashed,
+            'warmup_seconds': self.warmup_seconds,
+        }
+
+    def shutdown(self, wait: bool = True):
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        if self._executor is not None:
+            # Задачи в работе прерываются на ближайшем кадре - иначе shutdown ждал бы конца каждого видео
+            in_use = set(range(CANCEL_SLOTS)) - set(self._free_slots)
+            for slot in in_use:
+                self._cancel_flags[slot] = 1
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
+            logger.info("🛑 Пул анализа остановлен")
+
+
+analysis_pool = AnalysisWorkerPool()